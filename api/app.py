@@ -3,43 +3,132 @@ FastAPI application initialization and configuration.
 Handles app creation, middleware setup, and lifespan management.
 """
 
+import asyncio
+import contextlib
 import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
 from api.utils.dependencies import (
+    get_generation_pool,
     get_model,
     get_prompt_manager,
     get_retriever,
     get_tokenizer,
     get_vectordb,
+    refresh_vector_count,
 )
+from api.utils.middleware import RequestContextMiddleware
+from api.utils.responses import ORJSONResponse
 from config import settings
-from monitoring.tracing import get_tracer, setup_tracing
+from core.vectorstore import prefetch_index_files
+from llm.generation import generate_response
+from monitoring.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
 
-# Initialize tracing
-setup_tracing()
+def _warmup_generate(prompt: str, max_new_tokens: int) -> None:
+    """Run one warmup generation in-process or in the worker process.
+
+    Args:
+        prompt: Prompt text.
+        max_new_tokens: Number of tokens to generate.
+    """
+    params = {
+        "max_new_tokens": max_new_tokens,
+        "temperature": settings.TEMPERATURE,
+        "top_p": settings.TOP_P,
+    }
+    if settings.GENERATION_PROCESS_POOL:
+        get_generation_pool().submit(prompt, params).result()
+        return
+
+    generate_response(
+        tokenizer=get_tokenizer(),
+        model=get_model(),
+        prompt=prompt,
+        device=settings.DEVICE,
+        **params,
+    )
+
+
+def _run_warmup_inference() -> None:
+    """Push a dummy input through retrieval, reranking and generation.
+
+    Loading the components is not enough to make the first request fast:
+    the HNSW index pages, the reranker weights and the model's kernels are
+    only touched on first use. A one-token generation and a single-pair
+    rerank pay those costs before traffic arrives. On GPU, short
+    generations at each WARMUP_PROMPT_TOKENS length also prepare the
+    prefill and decode shapes of typical requests (with COMPILE_MODEL,
+    this is when the CUDA graphs are captured).
+    """
+    retriever = get_retriever()
+    retriever.retrieve(query="ping", top_k=1)
+
+    reranker = retriever.reranker
+    if reranker is not None:
+        reranker.predict([("ping", "pong")])
+
+    _warmup_generate("ping", max_new_tokens=1)
+
+    if settings.DEVICE == "cpu":
+        return
+
+    for num_tokens in settings.WARMUP_PROMPT_TOKENS:
+        # Two new tokens cover both the prefill and the decode step
+        _warmup_generate("ping " * num_tokens, max_new_tokens=2)
+        logger.info(f"Warmed up generation at ~{num_tokens} prompt tokens")
+
+
+async def _refresh_vector_count_periodically() -> None:
+    """Keep the /healthz vector count fresh without blocking probes."""
+    while True:
+        await run_in_threadpool(refresh_vector_count)
+        await asyncio.sleep(settings.HEALTH_CACHE_TTL)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    """Handle warm-up on startup."""
+    """Handle warm-up on startup and background refreshers."""
     logger.info("Warming up components...")
+    prefetched = await run_in_threadpool(prefetch_index_files)
+    logger.info(f"Prefetched {prefetched} vector index file(s)")
     get_tokenizer()
-    get_model()
+    if settings.GENERATION_PROCESS_POOL:
+        # Starts the worker, which loads the model in its own process
+        get_generation_pool()
+    else:
+        get_model()
     get_vectordb()
     get_retriever()
     get_prompt_manager()
+
+    if settings.ENABLE_WARMUP:
+        try:
+            await run_in_threadpool(_run_warmup_inference)
+        except Exception as e:
+            # An empty index or a missing reranker must not block startup
+            logger.warning(f"Warm-up inference failed: {e}")
+
     logger.info("✅ Warm-up complete")
 
+    refresher = asyncio.create_task(_refresh_vector_count_periodically())
+
     yield
 
+    refresher.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await refresher
+
+    if settings.GENERATION_PROCESS_POOL:
+        get_generation_pool().shutdown()
+
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application.
@@ -49,7 +138,10 @@ def create_app() -> FastAPI:
     """
     # Create FastAPI app
     app = FastAPI(
-        title="RAG Assistant API", version="1.0.0", lifespan=lifespan
+        title="RAG Assistant API",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
     # CORS middleware
@@ -61,6 +153,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Request/trace identifiers for structured logs
+    app.add_middleware(RequestContextMiddleware)
+
     # OpenTelemetry middleware if enabled
     if settings.ENABLE_TRACING:
         tracer = get_tracer()
@@ -4,11 +4,22 @@ and retrieval within the RAG service. Integrates with ChromaDB and
 the HuggingFace language model layer for response generation.
 """
 
+import asyncio
+import contextlib
 import logging
+import re
+import threading
 import time
+from collections.abc import AsyncIterator, Iterator
+from functools import lru_cache
 from typing import Any
 
+import orjson
+from cachetools import TTLCache
 from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
 from api.app import app
 from api.schemas import (
@@ -18,85 +29,175 @@ from api.schemas import (
     SettingsResponse,
 )
 from api.utils.dependencies import (
-    get_logger,
+    get_cached_vector_count,
+    get_generation_batcher,
+    get_generation_pool,
     get_model,
     get_prompt_manager,
     get_retriever,
     get_tokenizer,
-    get_vectordb,
+    refresh_vector_count,
+    structured_logger,
 )
 from config import IS_DEV, settings
-from llm.generation import generate_response
+from core.vectorstore import read_index_version
+from llm.generation import (
+    generate_response,
+    generate_response_streaming,
+    tokenize_prompt,
+)
 from monitoring.metrics import get_metrics_registry
 
 logger = logging.getLogger(__name__)
 
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_PROMETHEUS_INVALID_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+# Rerank candidate count per top_k in [1, 20]; reranking is disabled when
+# RERANK_TOP_K would not yield more candidates than results.
+_EFFECTIVE_RERANK_TOP_K: dict[int, int | None] = {
+    k: (
+        settings.RERANK_TOP_K
+        if settings.RERANK_TOP_K is not None and settings.RERANK_TOP_K > k
+        else None
+    )
+    for k in range(1, 21)
+}
+
+# Static /health body, encoded once
+_HEALTH_OK_BODY = b'{"status":"ok"}'
+
+
+def _model_response(model: BaseModel) -> Response:
+    """Serialize a response model in pydantic-core, skipping revalidation.
+
+    Returning a model from an endpoint makes FastAPI dump, revalidate and
+    re-encode it against response_model; the model is already valid.
+
+    Args:
+        model: Response model instance.
+
+    Returns:
+        JSON response with the model's serialized body.
+    """
+    return Response(
+        content=model.model_dump_json(), media_type="application/json"
+    )
+
 
 @app.get("/health")
 async def health_simple():
     """Simple health check endpoint."""
-    from fastapi.responses import JSONResponse
-
-    return JSONResponse(content={"status": "ok"}, status_code=200)
+    return Response(content=_HEALTH_OK_BODY, media_type="application/json")
 
 
 @app.get("/healthz", response_model=HealthResponse)
-async def health_check() -> HealthResponse:
-    """Health check endpoint with system sizes."""
-    sizes: dict[str, int | None] = {}
-    num_vectors: int | None = None
+async def health_check() -> Response:
+    """Health check endpoint with system sizes.
 
-    try:
-        vectordb = get_vectordb()
-        # Try to get collection info
-        if hasattr(vectordb, "_collection"):
-            collection = vectordb._collection
-            if collection is not None:
-                count_result = collection.count()
-                if count_result is not None:
-                    num_vectors = int(count_result)
-    except Exception:
-        # If vector store is not available or count fails, leave as None
-        pass
+    The vector count is served from a cache refreshed in the background
+    (see HEALTH_CACHE_TTL), so probes do not hit the vector store. If the
+    cache was never filled or has gone stale, one bounded refresh runs in
+    the threadpool; on timeout the last known count is returned.
+    """
+    sizes: dict[str, int | None] = {}
+    num_vectors, refreshed_at = get_cached_vector_count()
+
+    # Stale: the background refresher missed two cycles (or never ran)
+    if (
+        not refreshed_at
+        or time.monotonic() - refreshed_at > 2 * settings.HEALTH_CACHE_TTL
+    ):
+        try:
+            num_vectors = await asyncio.wait_for(
+                run_in_threadpool(refresh_vector_count),
+                timeout=settings.HEALTH_COUNT_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Vector count refresh timed out in /healthz")
 
     sizes["num_vectors"] = num_vectors
 
-    return HealthResponse(status="ok", sizes=sizes)
+    return _model_response(HealthResponse(status="ok", sizes=sizes))
+
+
+def _prometheus_name(name: str) -> str:
+    """Map a registry metric name onto the Prometheus name charset."""
+    return _PROMETHEUS_INVALID_CHARS.sub("_", name)
+
+
+def _prometheus_lines(registry: dict[str, Any]) -> Iterator[str]:
+    """Render the metrics registry in Prometheus text exposition format.
+
+    Args:
+        registry: Metrics registry with 'counters' and 'timers'.
+
+    Yields:
+        Exposition lines, newline-terminated.
+    """
+    for name, value in registry.get("counters", {}).items():
+        metric = _prometheus_name(name)
+        yield f"# TYPE {metric} counter\n{metric} {value}\n"
+
+    for name, stats in registry.get("timers", {}).items():
+        if not stats.count:
+            continue
+        metric = f"{_prometheus_name(name)}_ms"
+        # Summaries only carry _count/_sum; min and max are separate gauges
+        yield (
+            f"# TYPE {metric} summary\n"
+            f"{metric}_count {stats.count}\n"
+            f"{metric}_sum {stats.total}\n"
+            f"# TYPE {metric}_min gauge\n"
+            f"{metric}_min {stats.minimum}\n"
+            f"# TYPE {metric}_max gauge\n"
+            f"{metric}_max {stats.maximum}\n"
+        )
 
 
 @app.get("/metrics")
-async def metrics() -> dict[str, Any]:
-    """Temporary metrics endpoint returning JSON counters.
+async def metrics() -> StreamingResponse:
+    """Metrics endpoint in Prometheus text exposition format.
 
     Returns:
-        JSON dictionary with counters and timers from metrics registry.
+        Streamed text/plain response with counters and timer summaries.
+    """
+    return StreamingResponse(
+        _prometheus_lines(get_metrics_registry()),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+@app.get("/metrics/json")
+async def metrics_json() -> Response:
+    """Metrics endpoint returning JSON counters.
+
+    Returns:
+        JSON dictionary with counters and timers from metrics registry,
+        serialized directly with orjson.
     """
     registry = get_metrics_registry()
     # Format for JSON response
     result: dict[str, Any] = {
         "counters": registry.get("counters", {}),
         "timers": {
-            name: {
-                "count": len(timings),
-                "avg_ms": sum(timings) / len(timings) if timings else 0,
-                "min_ms": min(timings) if timings else 0,
-                "max_ms": max(timings) if timings else 0,
-            }
-            for name, timings in registry.get("timers", {}).items()
+            name: stats.as_dict()
+            for name, stats in registry.get("timers", {}).items()
         },
     }
-    return result
+    return Response(
+        content=orjson.dumps(result), media_type="application/json"
+    )
 
 
-@app.get("/settings", response_model=SettingsResponse)
-async def get_settings() -> SettingsResponse:
-    """Get current application settings.
+@lru_cache(maxsize=1)
+def _settings_body() -> bytes:
+    """Serialize the settings response once; settings are fixed at runtime.
 
     Returns:
-        Current configuration settings including model IDs, generation parameters,
-        and system paths.
+        JSON-encoded SettingsResponse.
     """
-    return SettingsResponse(
+    settings_response = SettingsResponse(
         model_id=settings.MODEL_ID,
         embedding_model=settings.EMBEDDING_MODEL,
         device=settings.DEVICE,
@@ -116,105 +217,340 @@ async def get_settings() -> SettingsResponse:
         reranker_model=settings.RERANKER_MODEL,
         is_dev=IS_DEV,
     )
+    return orjson.dumps(settings_response.model_dump())
 
 
-@app.post("/query", response_model=QueryResponse)
-async def query(request: QueryRequest) -> QueryResponse:
-    """Query the RAG system."""
-    logger = get_logger()
-    start_time = time.time()
+@app.get("/settings", response_model=SettingsResponse)
+async def get_settings() -> Response:
+    """Get current application settings.
 
-    try:
-        # Get components
-        retriever = get_retriever()
-        prompt_manager = get_prompt_manager()
-        tokenizer = get_tokenizer()
-        model = get_model()
-
-        # Determine top_k (clamped to [1, 20])
-        top_k = request.top_k or settings.TOP_K
-        top_k = max(1, min(20, top_k))  # Ensure it's in valid range
-
-        # Determine rerank_top_k
-        rerank_top_k: int | None = settings.RERANK_TOP_K
-        if rerank_top_k is not None and rerank_top_k <= top_k:
-            rerank_top_k = None  # Disable reranking if not enough candidates
-
-        # Retrieve documents with reranking
-        retrieved_docs = retriever.retrieve(
-            query=request.query, top_k=top_k, rerank_top_k=rerank_top_k
-        )
+    Returns:
+        Current configuration settings including model IDs, generation parameters,
+        and system paths, served from a pre-encoded body.
+    """
+    return Response(content=_settings_body(), media_type="application/json")
+
+
+def _generation_components() -> tuple[Any, Any, Any]:
+    """Resolve the prompt manager, tokenizer and model singletons.
 
-        if not retrieved_docs:
-            raise HTTPException(
-                status_code=404, detail="No relevant documents found"
+    Returns:
+        Tuple of (prompt_manager, tokenizer, model). The model is None when
+        generation runs in the worker process (GENERATION_PROCESS_POOL).
+    """
+    model = None if settings.GENERATION_PROCESS_POOL else get_model()
+    return get_prompt_manager(), get_tokenizer(), model
+
+
+def _generation_params() -> dict[str, Any]:
+    """Adaptive generation parameters based on dev mode.
+
+    Returns:
+        Dictionary with max_new_tokens, temperature and top_p.
+    """
+    if IS_DEV:
+        return {"max_new_tokens": 128, "temperature": 0.8, "top_p": 0.9}
+    return {
+        "max_new_tokens": settings.MAX_NEW_TOKENS,
+        "temperature": settings.TEMPERATURE,
+        "top_p": settings.TOP_P,
+    }
+
+
+# Resolved once at import; treat as read-only
+_GENERATION_PARAMS = _generation_params()
+
+# Bounds concurrent in-process /query generations (see GENERATION_CONCURRENCY)
+_generation_slots: asyncio.Semaphore | contextlib.nullcontext = (
+    asyncio.Semaphore(settings.GENERATION_CONCURRENCY)
+    if settings.GENERATION_CONCURRENCY > 0
+    else contextlib.nullcontext()
+)
+
+
+def _publication_ids(docs: list[Any]) -> list[str]:
+    """Extract publication IDs from sources (ordered, deduplicated)."""
+    return list(
+        dict.fromkeys(
+            doc.metadata.get(
+                "publication_id", doc.metadata.get("doc_id", "unknown")
             )
+            for doc in docs
+        )
+    )
 
-        # Build chat history from messages if provided (convert to dict format)
-        chat_history: list[dict[str, str]] | None = None
-        if request.messages:
-            chat_history = [
-                {"role": msg.role, "content": msg.content}
-                for msg in request.messages
-            ]
 
-        # Build prompt
-        prompt = prompt_manager.build_rag_prompt(
-            query=request.query,
-            context_docs=retrieved_docs,
-            chat_history=chat_history,
-            tokenizer=tokenizer,
+# Retrieval results for repeated queries; see _cached_retrieve
+_retrieval_cache: TTLCache | None = (
+    TTLCache(
+        maxsize=settings.RETRIEVAL_CACHE_SIZE,
+        ttl=settings.RETRIEVAL_CACHE_TTL,
+    )
+    if settings.RETRIEVAL_CACHE_SIZE > 0
+    else None
+)
+_retrieval_cache_lock = threading.Lock()
+
+
+def _cached_retrieve(
+    retriever: Any, query: str, top_k: int, rerank_top_k: int | None
+) -> list[Any]:
+    """Retrieve documents, serving repeated queries from a TTL cache.
+
+    Entries are keyed on the whitespace-normalized query, top_k,
+    rerank_top_k and the index version stamped by ingest, so re-ingesting
+    the collection invalidates them. Empty results and queries longer than
+    RETRIEVAL_CACHE_MAX_QUERY_CHARS are not cached.
+
+    Args:
+        retriever: Retriever instance.
+        query: User query.
+        top_k: Number of documents to return.
+        rerank_top_k: Rerank candidate count (None disables reranking).
+
+    Returns:
+        Retrieved documents; cached lists are shared and must not be
+        mutated.
+    """
+    if (
+        _retrieval_cache is None
+        or len(query) > settings.RETRIEVAL_CACHE_MAX_QUERY_CHARS
+    ):
+        return retriever.retrieve(
+            query=query, top_k=top_k, rerank_top_k=rerank_top_k
         )
 
-        # Adaptive generation parameters based on dev mode
-        if IS_DEV:
-            max_tokens = 128
-            temperature = 0.8
-            top_p = 0.9
-        else:
-            max_tokens = settings.MAX_NEW_TOKENS
-            temperature = settings.TEMPERATURE
-            top_p = settings.TOP_P
+    key = (
+        " ".join(query.split()),
+        top_k,
+        rerank_top_k,
+        read_index_version(),
+    )
+    with _retrieval_cache_lock:
+        docs = _retrieval_cache.get(key)
+    if docs is not None:
+        return docs
 
-        # Generate response (use threadpool for non-blocking execution)
-        from starlette.concurrency import run_in_threadpool
+    docs = retriever.retrieve(
+        query=query, top_k=top_k, rerank_top_k=rerank_top_k
+    )
+    if docs:
+        with _retrieval_cache_lock:
+            _retrieval_cache[key] = docs
+    return docs
 
-        def _generate():
-            return generate_response(
-                tokenizer=tokenizer,
-                model=model,
-                prompt=prompt,
-                max_new_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                device=settings.DEVICE,
-            )
 
-        answer = await run_in_threadpool(_generate)
+async def _retrieve_and_build_prompt(
+    request: QueryRequest,
+) -> tuple[list[Any], str, Any, Any]:
+    """Retrieve context documents and build the generation prompt.
 
-        # Extract publication IDs from sources
-        publication_ids: list[str] = []
-        for doc in retrieved_docs:
-            pub_id = doc.metadata.get(
-                "publication_id", doc.metadata.get("doc_id", "unknown")
+    Args:
+        request: Query request.
+
+    Returns:
+        Tuple of (retrieved_docs, prompt, tokenizer, model).
+
+    Raises:
+        HTTPException: 404 if no relevant documents are found.
+    """
+    # Determine top_k (clamped to [1, 20])
+    top_k = request.top_k or settings.TOP_K
+    top_k = max(1, min(20, top_k))  # Ensure it's in valid range
+
+    # Determine rerank_top_k (None disables reranking)
+    rerank_top_k = _EFFECTIVE_RERANK_TOP_K[top_k]
+
+    # Retrieve documents (with reranking) while the generation
+    # components are resolved; both run in worker threads.
+    retriever = get_retriever()
+    retrieved_docs, (prompt_manager, tokenizer, model) = await asyncio.gather(
+        run_in_threadpool(
+            _cached_retrieve,
+            retriever,
+            request.query,
+            top_k,
+            rerank_top_k,
+        ),
+        run_in_threadpool(_generation_components),
+    )
+
+    if not retrieved_docs:
+        raise HTTPException(
+            status_code=404, detail="No relevant documents found"
+        )
+
+    # Build chat history from messages if provided (convert to dict format).
+    # A generator is enough: the prompt manager consumes it exactly once.
+    chat_history: Iterator[dict[str, str]] | None = None
+    if request.messages:
+        chat_history = (
+            {"role": msg.role, "content": msg.content}
+            for msg in request.messages
+        )
+
+    # Build prompt
+    prompt = prompt_manager.build_rag_prompt(
+        query=request.query,
+        context_docs=retrieved_docs,
+        chat_history=chat_history,
+        tokenizer=tokenizer,
+    )
+
+    return retrieved_docs, prompt, tokenizer, model
+
+
+@app.post("/query", response_model=QueryResponse)
+async def query(request: QueryRequest) -> Response:
+    """Query the RAG system."""
+    start_time = time.perf_counter()
+
+    try:
+        retrieved_docs, prompt, tokenizer, model = (
+            await _retrieve_and_build_prompt(request)
+        )
+        generation_params = _GENERATION_PARAMS
+
+        if settings.GENERATION_PROCESS_POOL:
+            answer = await asyncio.wrap_future(
+                get_generation_pool().submit(prompt, generation_params)
             )
-            if pub_id not in publication_ids:
-                publication_ids.append(pub_id)
+        elif settings.ENABLE_GENERATION_BATCHING:
+            # Tokenize in this request's thread, then share one generate()
+            # call with concurrent requests
+            def _generate_batched():
+                input_ids = tokenize_prompt(tokenizer, prompt)
+                (answer,) = get_generation_batcher().submit(
+                    [(input_ids, generation_params)]
+                )
+                return answer
+
+            answer = await run_in_threadpool(_generate_batched)
+        else:
+            # Generate response (use threadpool for non-blocking execution)
+            def _generate():
+                return generate_response(
+                    tokenizer=tokenizer,
+                    model=model,
+                    prompt=prompt,
+                    device=settings.DEVICE,
+                    **generation_params,
+                )
+
+            # Wait for a slot on the event loop rather than in a thread
+            async with _generation_slots:
+                answer = await run_in_threadpool(_generate)
 
         # Calculate response time
-        response_time = time.time() - start_time
+        response_time = time.perf_counter() - start_time
 
         # Log query
-        logger.log_query(
+        structured_logger.log_query(
             query=request.query,
             retrieved_docs=retrieved_docs,
             response_time=response_time,
         )
 
-        return QueryResponse(answer=answer, sources=publication_ids)
+        return _model_response(
+            QueryResponse(
+                answer=answer, sources=_publication_ids(retrieved_docs)
+            )
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        structured_logger.log_error(error=e, context={"query": request.query})
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+def _sse_event(data: dict[str, Any], event: str | None = None) -> bytes:
+    """Encode one Server-Sent Events message.
+
+    Args:
+        data: JSON payload for the data field.
+        event: Optional event name; omitted for token messages.
 
+    Returns:
+        Encoded SSE message, terminated by a blank line.
+    """
+    header = f"event: {event}\n".encode() if event else b""
+    return header + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest) -> StreamingResponse:
+    """Query the RAG system, streaming the answer as Server-Sent Events.
+
+    Each generated text chunk is sent as a `data: {"token": ...}` message.
+    The stream ends with a `sources` event carrying the publication IDs,
+    or an `error` event if generation fails midway.
+    """
+    start_time = time.perf_counter()
+
+    try:
+        retrieved_docs, prompt, tokenizer, model = (
+            await _retrieve_and_build_prompt(request)
+        )
     except HTTPException:
         raise
     except Exception as e:
-        logger.log_error(error=e, context={"query": request.query})
+        structured_logger.log_error(error=e, context={"query": request.query})
         raise HTTPException(status_code=500, detail=str(e)) from e
+
+    generation_params = _GENERATION_PARAMS
+    # Set when the stream ends early (client gone) to stop generate()
+    stop_event = threading.Event()
+
+    def _chunks() -> Iterator[str]:
+        if settings.GENERATION_PROCESS_POOL:
+            # Tokens cannot be streamed back from the worker process;
+            # the full answer is sent as a single chunk.
+            yield get_generation_pool().submit(
+                prompt, generation_params
+            ).result()
+        else:
+            yield from generate_response_streaming(
+                tokenizer=tokenizer,
+                model=model,
+                prompt=prompt,
+                device=settings.DEVICE,
+                stop_event=stop_event,
+                **generation_params,
+            )
+
+    async def _events() -> AsyncIterator[bytes]:
+        # In-process streams share the /query generation slots; the chunks
+        # are pulled in the threadpool
+        slots = (
+            contextlib.nullcontext()
+            if settings.GENERATION_PROCESS_POOL
+            else _generation_slots
+        )
+        try:
+            async with slots:
+                async for token in iterate_in_threadpool(_chunks()):
+                    yield _sse_event({"token": token})
+        except Exception as e:
+            structured_logger.log_error(
+                error=e, context={"query": request.query}
+            )
+            yield _sse_event({"detail": str(e)}, event="error")
+            return
+        finally:
+            stop_event.set()
+
+        yield _sse_event(
+            {"sources": _publication_ids(retrieved_docs)}, event="sources"
+        )
+        structured_logger.log_query(
+            query=request.query,
+            retrieved_docs=retrieved_docs,
+            response_time=time.perf_counter() - start_time,
+        )
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -4,78 +4,188 @@ vector database, retriever, language model, and logging infrastructure.
 Ensures lazy initialization and shared state across API requests.
 """
 
-from typing import Any
+import logging
+import threading
+import time
+from collections.abc import Callable
+from functools import wraps
+from typing import Any, TypeVar
 
 from config import settings
+from core.batching import MicroBatcher
 from core.embeddings import get_embeddings
 from core.retrieval import AdvancedRetriever
 from core.utils.imports import import_langchain_chroma
+from core.vectorstore import create_vectordb
+from llm.generation import generate_grouped
+from llm.generation_pool import GenerationPool
 from llm.model_manager import ModelManager
 from llm.prompt_manager import PromptManager
 from monitoring.logging import StructuredLogger
 
 Chroma = import_langchain_chroma()
 
-# Global singletons (lazy-loaded)
-_tokenizer: Any | None = None
-_model: Any | None = None
-_retriever: AdvancedRetriever | None = None
-_prompt_manager: PromptManager | None = None
-_logger: StructuredLogger | None = None
-_vectordb: Chroma | None = None
+T = TypeVar("T")
+
+# (vector count, time.monotonic() of last refresh); 0.0 means never refreshed
+_num_vectors_cache: tuple[int | None, float] = (None, 0.0)
+
+logger = logging.getLogger(__name__)
+
+# Created eagerly: every /query logs through it
+structured_logger = StructuredLogger("rag_api", log_dir=settings.LOG_DIR)
+
+
+def _load_once(loader: Callable[[], T]) -> Callable[[], T]:
+    """Memoize a zero-argument loader, running it at most once.
+
+    Unlike functools.cache, concurrent first calls do not each run the
+    loader: the first caller loads under a lock while the others wait for
+    its result. Later calls return the stored value without locking.
+
+    Args:
+        loader: Function building the singleton.
+
+    Returns:
+        Wrapped getter returning the loader's result.
+    """
+    lock = threading.Lock()
+    result: list[T] = []
+
+    @wraps(loader)
+    def getter() -> T:
+        if not result:
+            with lock:
+                if not result:
+                    result.append(loader())
+        return result[0]
+
+    return getter
+
+
+@_load_once
+def _load_llm() -> tuple[Any, Any]:
+    """Load tokenizer and model together."""
+    return ModelManager().load_model()
+
+
+@_load_once
+def _load_tokenizer() -> Any:
+    """Load the tokenizer without the model weights."""
+    return ModelManager().load_tokenizer()
 
 
 def get_tokenizer() -> Any:
-    """Lazy-load tokenizer."""
-    global _tokenizer, _model
-    if _tokenizer is None:
-        model_manager = ModelManager()
-        _tokenizer, _model = model_manager.load_model()
-    return _tokenizer
+    """Lazy-load tokenizer.
+
+    With GENERATION_PROCESS_POOL the model lives in the worker process,
+    so only the tokenizer is loaded here.
+    """
+    if settings.GENERATION_PROCESS_POOL:
+        return _load_tokenizer()
+    return _load_llm()[0]
 
 
 def get_model() -> Any:
     """Lazy-load model."""
-    global _model
-    if _model is None:
-        get_tokenizer()  # Triggers loading of both
-    return _model
+    return _load_llm()[1]
+
 
+@_load_once
+def get_generation_batcher() -> MicroBatcher:
+    """Lazy-create the batcher coalescing concurrent generations.
 
+    Items are (input_ids, params) pairs, tokenized by the submitting
+    request (see tokenize_prompt); results are generated texts.
+    """
+    tokenizer, model = get_tokenizer(), get_model()
+    return MicroBatcher(
+        lambda requests: generate_grouped(
+            tokenizer=tokenizer,
+            model=model,
+            requests=requests,
+            device=settings.DEVICE,
+        ),
+        max_batch_size=settings.GENERATION_BATCH_SIZE,
+        max_wait_ms=settings.GENERATION_BATCH_WAIT_MS,
+        name="generation-batcher",
+    )
+
+
+@_load_once
+def get_generation_pool() -> GenerationPool:
+    """Lazy-start the generation worker process."""
+    return GenerationPool()
+
+
+@_load_once
 def get_vectordb() -> Chroma:
     """Lazy-load vector database."""
-    global _vectordb
-    if _vectordb is None:
-        embeddings = get_embeddings()
-        _vectordb = Chroma(
-            persist_directory=settings.CHROMA_DIR,
-            embedding_function=embeddings,
-        )
-    return _vectordb
+    embeddings = get_embeddings()
+    return create_vectordb(
+        embedding_function=embeddings,
+        persist_directory=settings.CHROMA_DIR,
+    )
+
+
+@_load_once
+def get_collection() -> Any | None:
+    """Lazy-resolve the underlying Chroma collection of the vector database.
+
+    Returns:
+        The chromadb Collection, or None if the wrapper does not expose one.
+    """
+    return getattr(get_vectordb(), "_collection", None)
+
+
+def refresh_vector_count() -> int | None:
+    """Count the vectors in the collection and store the result.
+
+    Blocking; call from a worker thread. On failure the previous count is
+    kept and only the refresh timestamp advances.
+
+    Returns:
+        Current vector count, or None if it could not be determined.
+    """
+    global _num_vectors_cache
+    num_vectors = _num_vectors_cache[0]
+    try:
+        collection = get_collection()
+        if collection is not None:
+            count_result = collection.count()
+            if count_result is not None:
+                num_vectors = int(count_result)
+    except Exception as e:
+        logger.debug(f"Vector count refresh failed: {e}")
+
+    _num_vectors_cache = (num_vectors, time.monotonic())
+    return num_vectors
+
+
+def get_cached_vector_count() -> tuple[int | None, float]:
+    """Return the cached vector count and its refresh timestamp.
+
+    Returns:
+        Tuple of (vector count or None, time.monotonic() of last refresh).
+        A timestamp of 0.0 means the count has never been refreshed.
+    """
+    return _num_vectors_cache
 
 
+@_load_once
 def get_retriever() -> AdvancedRetriever:
     """Lazy-load retriever."""
-    global _retriever
-    if _retriever is None:
-        vectordb = get_vectordb()
-        _retriever = AdvancedRetriever(
-            vectordb=vectordb, reranker_model=settings.RERANKER_MODEL
-        )
-    return _retriever
+    return AdvancedRetriever(
+        vectordb=get_vectordb(), reranker_model=settings.RERANKER_MODEL
+    )
 
 
+@_load_once
 def get_prompt_manager() -> PromptManager:
     """Lazy-load prompt manager."""
-    global _prompt_manager
-    if _prompt_manager is None:
-        _prompt_manager = PromptManager()
-    return _prompt_manager
+    return PromptManager()
 
 
 def get_logger() -> StructuredLogger:
-    """Lazy-load logger."""
-    global _logger
-    if _logger is None:
-        _logger = StructuredLogger("rag_api", log_dir=settings.LOG_DIR)
-    return _logger
+    """Return the structured query logger."""
+    return structured_logger
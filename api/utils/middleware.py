@@ -0,0 +1,69 @@
+"""
+ASGI middleware for request-scoped observability context.
+Binds request and trace identifiers for structured logging and
+echoes the request identifier back to the client.
+"""
+
+import uuid
+from typing import Any
+
+from monitoring.logging import bind_request_context, reset_request_context
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+def _trace_id_from_traceparent(traceparent: bytes | None) -> str | None:
+    """Extract the trace id from a W3C traceparent header.
+
+    Args:
+        traceparent: Raw header value ("version-traceid-parentid-flags").
+
+    Returns:
+        The 32-character trace id, or None if the header is malformed.
+    """
+    if not traceparent:
+        return None
+    parts = traceparent.split(b"-")
+    if len(parts) != 4 or len(parts[1]) != 32:
+        return None
+    return parts[1].decode("ascii", errors="ignore") or None
+
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware binding request_id/trace_id per HTTP request."""
+
+    def __init__(self, app: Any):
+        """Initialize middleware.
+
+        Args:
+            app: Downstream ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        """Bind the request context around the downstream application."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = (
+            headers.get(REQUEST_ID_HEADER, b"").decode("latin-1")
+            or uuid.uuid4().hex
+        )
+        trace_id = _trace_id_from_traceparent(headers.get(b"traceparent"))
+
+        async def send_with_request_id(message: Any) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = [
+                    *message["headers"],
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        tokens = bind_request_context(request_id, trace_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            reset_request_context(tokens)
@@ -0,0 +1,29 @@
+"""
+Response classes for the API.
+Provides an orjson-backed JSON response used as the application
+default to keep serialization off the Python hot path.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Equivalent to fastapi.responses.ORJSONResponse, which newer FastAPI
+    releases deprecate; kept local so it works across supported versions.
+    """
+
+    def render(self, content: Any) -> bytes:
+        """Serialize content to JSON bytes.
+
+        Args:
+            content: JSON-compatible content (already encoded by FastAPI).
+
+        Returns:
+            UTF-8 encoded JSON.
+        """
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
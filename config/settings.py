@@ -6,10 +6,12 @@ and infrastructure settings for the RAG pipeline.
 
 import os
 import socket
+from functools import cache
 
 from pydantic_settings import BaseSettings
 
 
+@cache
 def is_dev_environment() -> bool:
     """Detect if running in development mode.
 
@@ -19,7 +21,8 @@ def is_dev_environment() -> bool:
     - Container hostname ends with '-dev'
 
     Returns:
-        True if dev mode detected, False otherwise.
+        True if dev mode detected, False otherwise. Computed once per
+        process.
     """
     if os.getenv("DEV_MODE") == "true":
         return True
@@ -48,6 +51,13 @@ class Settings(BaseSettings):
 
     EMBEDDING_MODEL: str = "intfloat/multilingual-e5-large"
 
+    # Dynamically quantize the embedding model's Linear layers to INT8 when
+    # it runs on CPU (uses VNNI int8 dot products where available)
+    EMBEDDING_INT8: bool = False
+
+    # Query embeddings memoized by the API's embedding function (0 disables)
+    QUERY_EMBEDDING_CACHE_SIZE: int = 4096
+
     DEVICE: str = "cuda"  # cpu for dev purposes or non GPU-enabled machines
 
     CHUNK_SIZE: int = 800
@@ -58,28 +68,135 @@ class Settings(BaseSettings):
 
     RERANK_TOP_K: int | None = 10
 
+    # Coalesce reranker calls from concurrent queries into batched passes
+    ENABLE_RERANK_BATCHING: bool = False
+
+    RERANK_BATCH_SIZE: int = 128
+
+    RERANK_BATCH_WAIT_MS: float = 5.0
+
+    # Cached cross-encoder scores per (query, document) pair (0 disables)
+    RERANK_SCORE_CACHE_SIZE: int = 50_000
+
+    # In-process cache of retrieval results for repeated queries (0 disables)
+    RETRIEVAL_CACHE_SIZE: int = 10_000
+
+    # Seconds a cached retrieval result stays valid
+    RETRIEVAL_CACHE_TTL: float = 300.0
+
+    # Longer queries are not cached, bounding cache memory
+    RETRIEVAL_CACHE_MAX_QUERY_CHARS: int = 1000
+
+    # Streamlit answers kept for near-duplicate first questions (0 disables)
+    SEMANTIC_CACHE_SIZE: int = 128
+
+    # Minimum query embedding cosine similarity for a semantic cache hit
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+
     MAX_CONTEXT_TOKENS: int = 6000
 
+    # Most recent chat messages the Streamlit app puts in the prompt
+    CHAT_HISTORY_MAX_MESSAGES: int = 12
+
     MAX_NEW_TOKENS: int = 768
 
     TEMPERATURE: float = 0.6
 
     TOP_P: float = 0.9
 
+    # KV cache strategy passed to generate() on GPU ("static", "dynamic", ...)
+    KV_CACHE_IMPLEMENTATION: str | None = "static"
+
+    # Compute the KV cache of the fixed prompt preamble once and reuse it
+    # for every single-prompt generation. Applies where no
+    # KV_CACHE_IMPLEMENTATION is used (CPU, dev mode, or setting unset)
+    PREFIX_KV_CACHE: bool = True
+
+    # Load GPU weights as bitsandbytes INT8 (halves weight memory vs bf16)
+    LOAD_IN_8BIT: bool = False
+
+    # Dev mode: load the CPU model as bitsandbytes NF4 instead of quantizing
+    # FP32 weights to dynamic INT8 after loading (about 4x smaller weights)
+    LOAD_IN_4BIT: bool = False
+
+    # Wrap the model forward in torch.compile (compiled during warmup)
+    COMPILE_MODEL: bool = False
+
+    # Coalesce concurrent /query generations into batched generate() calls
+    ENABLE_GENERATION_BATCHING: bool = False
+
+    GENERATION_BATCH_SIZE: int = 8
+
+    GENERATION_BATCH_WAIT_MS: float = 10.0
+
+    # Max in-process /query generations running at once; further requests
+    # wait on the event loop instead of contending for the GPU (0 = no limit).
+    # Also sizes the worker pool generating /query/stream responses
+    GENERATION_CONCURRENCY: int = 1
+
+    # Run generation in a dedicated worker process that owns the model
+    GENERATION_PROCESS_POOL: bool = False
+
+    # Run CPU generation under bfloat16 autocast (needs AVX512-BF16/AMX)
+    CPU_BF16_AUTOCAST: bool = False
+
+    # CPU production: serve an INT8 ONNX Runtime export of the model
+    # (needs optimum[onnxruntime]; exported once into ONNX_DIR)
+    ENABLE_ONNX_INT8: bool = False
+
+    ONNX_DIR: str = ".onnx"
+
+    # CPU production (PyTorch path): apply Intel Extension for PyTorch
+    # operator fusion and AVX-512/AMX kernels (needs
+    # intel-extension-for-pytorch; bf16 weights with CPU_BF16_AUTOCAST)
+    ENABLE_IPEX: bool = False
+
     DATA_FOLDER: str = "data"
 
     CHROMA_DIR: str = ".chroma"
 
+    CHROMA_COLLECTION: str = "langchain"
+
+    # HNSW index parameters (applied when the collection is created)
+    HNSW_CONSTRUCTION_EF: int = 200
+
+    HNSW_M: int = 32
+
+    HNSW_SEARCH_EF: int = 100
+
+    # Seconds between background refreshes of the /healthz vector count
+    HEALTH_CACHE_TTL: float = 30.0
+
+    # Upper bound (seconds) on an inline vector count refresh in /healthz
+    HEALTH_COUNT_TIMEOUT: float = 1.0
+
     LOG_LEVEL: str = "INFO"
 
+    # Also log to stdout; None (default) does so only when stdout is a TTY
+    LOG_CONSOLE: bool | None = None
+
     ENABLE_TRACING: bool = False
 
     LOG_DIR: str = "logs"
 
     RERANKER_MODEL: str | None = "cross-encoder/ms-marco-MiniLM-L-6-v2"
 
+    # Dynamically quantize the reranker's Linear layers to INT8 on CPU
+    RERANKER_INT8: bool = False
+
+    # Run the reranker in FP16 when it is on a CUDA device
+    RERANKER_FP16: bool = True
+
     HF_TOKEN: str | None = None
 
+    # Run a dummy query through the pipeline at API startup
+    ENABLE_WARMUP: bool = True
+
+    # Approximate prompt lengths (tokens) run through the model during GPU
+    # warmup, so kernels, compiled graphs and allocator pools for typical
+    # request shapes exist before traffic arrives
+    WARMUP_PROMPT_TOKENS: list[int] = [128, 512, 2048]
+
     class Config:
         env_file = ".env"
         case_sensitive = False
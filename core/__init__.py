@@ -3,22 +3,42 @@ Core RAG (Retrieval-Augmented Generation) functionality package.
 
 This package provides the foundational components for document processing and retrieval:
 - Document chunking strategies (TextChunker, MetadataAwareChunker)
-- Embedding model management and generation (EmbeddingModel, get_embeddings)
+- Embedding model management and generation (EmbeddingModel, BatchedHuggingFaceEmbeddings,
+  CachedQueryEmbeddings, get_embeddings)
 - Retrieval engines with advanced features (RetrievalEngine, AdvancedRetriever, Reranker)
+- Micro-batching of model calls across concurrent requests (MicroBatcher)
+- Similarity cache for answers to near-duplicate queries (SemanticCache)
+- Vector store construction and index prefetching (create_vectordb, prefetch_index_files)
+- Index version marker written by ingest (stamp_index_version, read_index_version)
 """
 
 import core.huggingface_manager  # noqa: F401
 
+from .batching import MicroBatcher
 from .chunking import ChunkingStrategy, MetadataAwareChunker, TextChunker
-from .embeddings import EmbeddingModel, get_embeddings
+from .embeddings import (
+    BatchedHuggingFaceEmbeddings,
+    CachedQueryEmbeddings,
+    EmbeddingModel,
+    get_embeddings,
+)
 from .retrieval import (
     AdvancedRetriever,
     Reranker,
     RetrievalEngine,
     RetrievalError,
 )
+from .semantic_cache import SemanticCache
+from .vectorstore import (
+    create_vectordb,
+    prefetch_index_files,
+    read_index_version,
+    stamp_index_version,
+)
 
 __all__ = [
+    "BatchedHuggingFaceEmbeddings",
+    "CachedQueryEmbeddings",
     "EmbeddingModel",
     "get_embeddings",
     "ChunkingStrategy",
@@ -28,4 +48,10 @@ __all__ = [
     "RetrievalError",
     "RetrievalEngine",
     "Reranker",
+    "MicroBatcher",
+    "SemanticCache",
+    "create_vectordb",
+    "prefetch_index_files",
+    "read_index_version",
+    "stamp_index_version",
 ]
@@ -0,0 +1,126 @@
+"""
+Micro-batching of model calls across concurrent requests.
+Collects work submitted from request threads within a short window
+and runs it as a single batched call on a dedicated worker thread.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Coalesces concurrent submissions into batched calls.
+
+    Each submit() call contributes a list of items and blocks until the
+    batch containing them has been processed. A single worker thread
+    drains the queue until max_batch_size items are collected or
+    max_wait_ms has elapsed since the first one, then calls
+    process_batch once and hands every caller its slice of the results.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[Any]], Sequence[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batcher",
+    ):
+        """Initialize micro-batcher.
+
+        Args:
+            process_batch: Function mapping a list of items to a sequence
+                of results of the same length and order.
+            max_batch_size: Item count that triggers an immediate dispatch.
+            max_wait_ms: Maximum time to wait for more items after the
+                first one arrives.
+            name: Worker thread name.
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue: queue.Queue[tuple[list[Any], Future]] = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, items: Sequence[Any]) -> Sequence[Any]:
+        """Process items as part of the next batch and wait for the result.
+
+        Args:
+            items: Items to process.
+
+        Returns:
+            Results for these items, in order.
+
+        Raises:
+            Exception: Whatever process_batch raised for the batch.
+        """
+        if not items:
+            return []
+
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((list(items), future))
+        return future.result()
+
+    def _ensure_worker(self) -> None:
+        """Start the worker thread on first use (or if it has died)."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._worker.start()
+
+    def _run(self) -> None:
+        """Collect submissions into batches and dispatch them forever."""
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    submission = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                pending.append(submission)
+                size += len(submission[0])
+
+            self._dispatch(pending)
+
+    def _dispatch(self, pending: list[tuple[list[Any], Future]]) -> None:
+        """Run one batched call and resolve the submitters' futures.
+
+        Args:
+            pending: Submitted (items, future) pairs, in arrival order.
+        """
+        batch = [item for items, _ in pending for item in items]
+        try:
+            results = self.process_batch(batch)
+        except BaseException as e:
+            logger.warning(f"{self.name}: batch of {len(batch)} failed: {e}")
+            for _, future in pending:
+                future.set_exception(e)
+            # KeyboardInterrupt, SystemExit etc. still end the worker; the
+            # next submit starts a new one
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        offset = 0
+        for items, future in pending:
+            future.set_result(results[offset : offset + len(items)])
+            offset += len(items)
@@ -4,10 +4,11 @@ Implements metadata-aware chunking with overlap preservation
 for vector store indexing using LangChain document structures.
 """
 
-import hashlib
 from abc import ABC, abstractmethod
 from typing import Any
 
+import xxhash
+
 from core.utils.imports import (
     import_langchain_document_class,
     import_langchain_recursive_character_text_splitter,
@@ -18,6 +19,11 @@ RecursiveCharacterTextSplitter = (
     import_langchain_recursive_character_text_splitter()
 )
 
+# Chunk ID scheme, stored in chunk metadata. Bump when the hash changes so
+# stale IDs can be detected and re-indexed.
+# 1: first 16 hex chars of SHA-256; 2: XXH3-64 (16 hex chars)
+CHUNK_ID_HASH_VERSION = 2
+
 
 class ChunkingStrategy(ABC):
     """Abstract base class for chunking strategies."""
@@ -58,15 +64,15 @@ class TextChunker(ChunkingStrategy):
             List of text chunks.
         """
         words = text.split()
-        chunks = []
-        step = self.chunk_size - self.chunk_overlap
+        if not words:
+            return [text]
 
-        for i in range(0, len(words), step):
-            chunk = " ".join(words[i : i + self.chunk_size])
-            if chunk.strip():
-                chunks.append(chunk)
-
-        return chunks if chunks else [text]
+        # Words from str.split() are non-empty, so every window is too
+        step = self.chunk_size - self.chunk_overlap
+        return [
+            " ".join(words[i : i + self.chunk_size])
+            for i in range(0, len(words), step)
+        ]
 
 
 class MetadataAwareChunker:
@@ -105,12 +111,12 @@ class MetadataAwareChunker:
             chunk_text: Text content of the chunk.
 
         Returns:
-            First 16 hex characters of SHA256 hash.
+            16 hex characters of the XXH3-64 hash (non-cryptographic; IDs
+            only need to be stable).
         """
         first_50_chars = chunk_text[:50] if chunk_text else ""
         hash_input = f"{doc_id}_{chunk_index}_{first_50_chars}"
-        hash_value = hashlib.sha256(hash_input.encode("utf-8")).hexdigest()
-        return hash_value[:16]
+        return xxhash.xxh3_64_hexdigest(hash_input.encode("utf-8"))
 
     def chunk_with_metadata(
         self, text: str, source: str, doc_id: str, **metadata: Any
@@ -128,34 +134,30 @@ class MetadataAwareChunker:
 
         Note:
             Each chunk will have: source, doc_id, chunk_index, total_chunks,
-            chunk_id, and any additional metadata passed via **metadata.
+            chunk_id, chunk_id_version, and any additional metadata passed
+            via **metadata.
         """
         # Split text into chunks
         chunks = self.splitter.split_text(text)
         total_chunks = len(chunks)
 
-        # Create Document objects with metadata
-        documents = []
-        for idx, chunk_text in enumerate(chunks):
-            # Generate stable chunk ID
-            chunk_id = self._generate_chunk_id(
-                doc_id=doc_id, chunk_index=idx, chunk_text=chunk_text
+        # One dict literal per chunk; additional metadata is layered last so
+        # it can override the defaults, as before
+        return [
+            Document(
+                page_content=chunk_text,
+                metadata={
+                    "source": source,
+                    "doc_id": doc_id,
+                    "chunk_index": idx,
+                    "total_chunks": total_chunks,
+                    # Stable chunk ID
+                    "chunk_id": self._generate_chunk_id(
+                        doc_id=doc_id, chunk_index=idx, chunk_text=chunk_text
+                    ),
+                    "chunk_id_version": CHUNK_ID_HASH_VERSION,
+                    **metadata,
+                },
             )
-
-            # Build metadata dictionary
-            chunk_metadata: dict[str, Any] = {
-                "source": source,
-                "doc_id": doc_id,
-                "chunk_index": idx,
-                "total_chunks": total_chunks,
-                "chunk_id": chunk_id,
-            }
-
-            # Add any additional metadata
-            chunk_metadata.update(metadata)
-
-            # Create Document
-            doc = Document(page_content=chunk_text, metadata=chunk_metadata)
-            documents.append(doc)
-
-        return documents
+            for idx, chunk_text in enumerate(chunks)
+        ]
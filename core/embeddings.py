@@ -4,8 +4,14 @@ Wraps sentence-transformers models and provides LangChain-compatible
 embeddings for ChromaDB integration.
 """
 
+import asyncio
+import threading
+from collections.abc import Callable
 from typing import Any
 
+import numpy as np
+from cachetools import LRUCache
+from pydantic import PrivateAttr
 from sentence_transformers import SentenceTransformer
 
 from config import settings
@@ -14,11 +20,210 @@ from core.utils.imports import import_langchain_huggingface_embeddings
 HuggingFaceEmbeddings = import_langchain_huggingface_embeddings()
 
 
-def get_embeddings():
+def quantize_for_cpu(model: Any) -> Any:
+    """Dynamically quantize the model's Linear layers to INT8, in place.
+
+    Weights are stored as int8 and activations are quantized on the fly,
+    roughly halving inference time on CPUs with VNNI and shrinking the
+    weights 4x. Outputs stay float32.
+
+    Args:
+        model: Loaded SentenceTransformer or CrossEncoder.
+
+    Returns:
+        The same model; unchanged unless it runs on CPU.
+    """
+    if model.device.type != "cpu":
+        return model
+
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    return quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+async def embed_in_batches(
+    encode: Callable[[list[str]], np.ndarray],
+    texts: list[str],
+    batch_size: int = 64,
+    concurrency: int = 4,
+) -> np.ndarray:
+    """Embed texts as length-sorted mini-batches run concurrently.
+
+    Sorting by length keeps similarly sized texts together so each batch
+    carries little padding; up to `concurrency` batches are encoded at once
+    in worker threads.
+
+    Args:
+        encode: Function mapping a list of texts to an embedding array.
+        texts: Texts to embed.
+        batch_size: Number of texts per mini-batch.
+        concurrency: Maximum number of mini-batches encoded at once.
+
+    Returns:
+        Embedding array with one row per text, in the order of texts.
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    order = np.argsort([len(text) for text in texts], kind="stable")
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def encode_batch(indices: np.ndarray) -> np.ndarray:
+        async with semaphore:
+            return await asyncio.to_thread(
+                encode, [texts[idx] for idx in indices]
+            )
+
+    batches = await asyncio.gather(
+        *(
+            encode_batch(order[start : start + batch_size])
+            for start in range(0, len(texts), batch_size)
+        )
+    )
+
+    stacked = np.concatenate(batches)
+    embeddings = np.empty_like(stacked)
+    embeddings[order] = stacked
+    return embeddings
+
+
+class BatchedHuggingFaceEmbeddings(HuggingFaceEmbeddings):
+    """HuggingFaceEmbeddings that embeds documents in concurrent batches.
+
+    Used on ingest paths, where embed_documents receives every chunk at
+    once and is called from synchronous code.
+    """
+
+    batch_size: int = 64
+    concurrency: int = 4
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        """Encode one mini-batch with the underlying SentenceTransformer.
+
+        If the GPU runs out of memory (concurrent batches of long chunks),
+        the batch is split in half and each half encoded in turn.
+        """
+        try:
+            return self.client.encode(
+                texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                **self.encode_kwargs,
+            )
+        except RuntimeError as e:
+            import torch
+
+            if (
+                not isinstance(e, torch.cuda.OutOfMemoryError)
+                or len(texts) == 1
+            ):
+                raise
+            torch.cuda.empty_cache()
+
+        middle = len(texts) // 2
+        return np.concatenate(
+            [self._encode(texts[:middle]), self._encode(texts[middle:])]
+        )
+
+    async def aembed_array(self, texts: list[str]) -> np.ndarray:
+        """Compute document embeddings as one float32 array.
+
+        Chroma accepts the array as is, so ingest can skip the per-float
+        boxing of the list-returning LangChain interface.
+
+        Args:
+            texts: The list of texts to embed.
+
+        Returns:
+            Contiguous float32 array with one row per text.
+        """
+        texts = [text.replace("\n", " ") for text in texts]
+        embeddings = await embed_in_batches(
+            self._encode, texts, self.batch_size, self.concurrency
+        )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        """Synchronous aembed_array; must not be called from a coroutine."""
+        return asyncio.run(self.aembed_array(texts))
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Compute document embeddings in concurrent mini-batches.
+
+        Args:
+            texts: The list of texts to embed.
+
+        Returns:
+            List of embeddings, one for each text.
+        """
+        return (await self.aembed_array(texts)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Compute document embeddings in concurrent mini-batches.
+
+        Args:
+            texts: The list of texts to embed.
+
+        Returns:
+            List of embeddings, one for each text.
+
+        Note:
+            Runs its own event loop, so it must not be called from a
+            coroutine; use aembed_documents there.
+        """
+        return asyncio.run(self.aembed_documents(texts))
+
+
+class CachedQueryEmbeddings(HuggingFaceEmbeddings):
+    """HuggingFaceEmbeddings that memoizes query embeddings.
+
+    Used by the API, where retries, probes and popular questions embed
+    the same query string repeatedly. Document embedding is unchanged.
+    """
+
+    _query_cache: LRUCache = PrivateAttr(
+        default_factory=lambda: LRUCache(
+            maxsize=settings.QUERY_EMBEDDING_CACHE_SIZE
+        )
+    )
+    _query_cache_lock: threading.Lock = PrivateAttr(
+        default_factory=threading.Lock
+    )
+
+    def embed_query(self, text: str) -> list[float]:
+        """Compute query embeddings, reusing earlier results.
+
+        Args:
+            text: The text to embed.
+
+        Returns:
+            Embedding for the text; cached lists are shared and must not be
+            mutated.
+        """
+        with self._query_cache_lock:
+            embedding = self._query_cache.get(text)
+        if embedding is None:
+            embedding = super().embed_query(text)
+            with self._query_cache_lock:
+                self._query_cache[text] = embedding
+        return embedding
+
+
+def get_embeddings(batched: bool = False):
     """Get HuggingFaceEmbeddings instance for LangChain integration.
 
+    Args:
+        batched: Return BatchedHuggingFaceEmbeddings, which embeds
+            documents in length-sorted concurrent mini-batches. Meant for
+            ingest scripts. Otherwise query embeddings are memoized when
+            QUERY_EMBEDDING_CACHE_SIZE is positive.
+
     Returns:
-        HuggingFaceEmbeddings instance configured with settings.EMBEDDING_MODEL.
+        HuggingFaceEmbeddings instance configured with settings.EMBEDDING_MODEL
+        (INT8-quantized on CPU when EMBEDDING_INT8 is set).
 
     Raises:
         ImportError: If HuggingFaceEmbeddings cannot be imported.
@@ -28,48 +233,107 @@ def get_embeddings():
             "HuggingFaceEmbeddings not available. "
             "Please install langchain or langchain-community."
         )
-    return HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
+    if batched:
+        embeddings_cls = BatchedHuggingFaceEmbeddings
+    elif settings.QUERY_EMBEDDING_CACHE_SIZE > 0:
+        embeddings_cls = CachedQueryEmbeddings
+    else:
+        embeddings_cls = HuggingFaceEmbeddings
+    embeddings = embeddings_cls(model_name=settings.EMBEDDING_MODEL)
+    if settings.EMBEDDING_INT8:
+        quantize_for_cpu(embeddings.client)
+    return embeddings
 
 
 class EmbeddingModel:
     """Wrapper for sentence-transformers embedding models."""
 
-    def __init__(self, model_name: str | None = None):
+    def __init__(
+        self,
+        model_name: str | None = None,
+        model: SentenceTransformer | None = None,
+    ):
         """Initialize embedding model.
 
         Args:
             model_name: Name of the model to use. Defaults to settings value.
+            model: Already loaded SentenceTransformer to wrap (e.g. the
+                client of a LangChain embeddings instance) instead of
+                loading a second copy.
         """
         self.model_name = model_name or settings.EMBEDDING_MODEL
-        self._model = None
+        self._model = model
 
     @property
     def model(self) -> SentenceTransformer:
         """Lazy load the embedding model."""
         if self._model is None:
             self._model = SentenceTransformer(self.model_name)
+            if settings.EMBEDDING_INT8:
+                quantize_for_cpu(self._model)
         return self._model
 
-    def encode(self, texts: list[str], **kwargs: Any) -> list[list[float]]:
+    def encode(
+        self,
+        texts: list[str],
+        batch_size: int = 64,
+        normalize: bool = True,
+        **kwargs: Any,
+    ) -> np.ndarray:
         """Encode texts into embeddings.
 
         Args:
             texts: List of text strings to encode.
+            batch_size: Number of texts per forward pass.
+            normalize: Whether to L2-normalize the embeddings.
             **kwargs: Additional arguments to pass to the model.
 
         Returns:
-            List of embedding vectors.
+            Contiguous float32 array of shape (len(texts), dim), in the
+            order of texts.
+
+        Note:
+            sentence-transformers sorts texts by length before batching,
+            so batches carry little padding. Call .tolist() on the result
+            only where a plain list is required.
         """
-        return self.model.encode(texts, **kwargs).tolist()
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=normalize,
+            **kwargs,
+        )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
 
-    def encode_single(self, text: str, **kwargs: Any) -> list[float]:
+    async def aembed_documents(
+        self, texts: list[str], batch_size: int = 64, concurrency: int = 4
+    ) -> np.ndarray:
+        """Encode texts in length-sorted mini-batches run concurrently.
+
+        Args:
+            texts: List of text strings to encode.
+            batch_size: Number of texts per mini-batch.
+            concurrency: Maximum number of mini-batches encoded at once.
+
+        Returns:
+            Float32 array of shape (len(texts), dim), in the order of texts.
+        """
+        return await embed_in_batches(
+            lambda batch: self.encode(batch, batch_size=batch_size),
+            texts,
+            batch_size,
+            concurrency,
+        )
+
+    def encode_single(self, text: str, **kwargs: Any) -> np.ndarray:
         """Encode a single text into an embedding.
 
         Args:
             text: Text string to encode.
-            **kwargs: Additional arguments to pass to the model.
+            **kwargs: Additional arguments to pass to encode.
 
         Returns:
-            Embedding vector.
+            Embedding vector as a float32 array.
         """
         return self.encode([text], **kwargs)[0]
@@ -4,20 +4,26 @@ Queries ChromaDB vector store and applies relevance scoring to improve
 result quality for RAG context generation.
 """
 
+import threading
+from functools import cache
+from typing import Any
+
 import numpy as np
+import xxhash
+from cachetools import LRUCache
 
 from config import settings
-from core.embeddings import EmbeddingModel
+from core.batching import MicroBatcher
+from core.embeddings import EmbeddingModel, get_embeddings, quantize_for_cpu
 from core.utils.imports import (
     import_langchain_chroma,
     import_langchain_document_class,
-    import_langchain_huggingface_embeddings,
     import_sentence_transformers_cross_encoder,
 )
+from core.vectorstore import create_vectordb
 
 Document = import_langchain_document_class()
 Chroma = import_langchain_chroma()
-HuggingFaceEmbeddings = import_langchain_huggingface_embeddings()
 CrossEncoder = import_sentence_transformers_cross_encoder()
 
 
@@ -27,6 +33,69 @@ class RetrievalError(Exception):
     pass
 
 
+def top_k_indices(scores: Any, k: int | None) -> np.ndarray:
+    """Indices of the k highest scores, best first.
+
+    Selects the top k with argpartition and sorts only those, which is
+    O(n + k log k) instead of a full O(n log n) sort.
+
+    Args:
+        scores: 1-D array-like of scores.
+        k: Number of indices to return; None or k >= len(scores) returns
+            all indices sorted.
+
+    Returns:
+        Integer index array of length min(k, len(scores)).
+    """
+    negated = -np.asarray(scores)
+    if k is None or k >= len(negated):
+        return np.argsort(negated, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    top = np.argpartition(negated, k - 1)[:k]
+    return top[np.argsort(negated[top], kind="stable")]
+
+
+@cache
+def _cached_cross_encoder(
+    encoder_cls: Any, model_name: str, max_length: int | None
+) -> Any:
+    """Instantiate a cross-encoder once per class, model and max length."""
+    encoder = encoder_cls(model_name, max_length=max_length)
+    if settings.RERANKER_INT8:
+        quantize_for_cpu(encoder)
+    if settings.RERANKER_FP16 and encoder.device.type == "cuda":
+        encoder.model.half()
+    return encoder
+
+
+def load_cross_encoder(model_name: str, max_length: int | None = None) -> Any:
+    """Load a cross-encoder model (and its tokenizer) once per process.
+
+    Rerankers built for the same model share a single instance instead of
+    each loading its own weights and tokenizer. With RERANKER_INT8 the
+    model is INT8-quantized when it runs on CPU; with RERANKER_FP16 it is
+    cast to half precision when it runs on a GPU.
+
+    Args:
+        model_name: Cross-encoder model name.
+        max_length: Optional maximum sequence length.
+
+    Returns:
+        Shared CrossEncoder instance.
+
+    Raises:
+        ImportError: If sentence-transformers is not installed.
+    """
+    if CrossEncoder is None:
+        raise ImportError(
+            "sentence-transformers is required for reranking. "
+            "Install with: pip install sentence-transformers"
+        )
+    return _cached_cross_encoder(CrossEncoder, model_name, max_length)
+
+
 class Reranker:
     """Reranker using cross-encoder models."""
 
@@ -42,19 +111,17 @@ class Reranker:
     @property
     def model(self):
         """Lazy load the reranker model."""
-        if CrossEncoder is None:
-            raise ImportError(
-                "sentence-transformers is required for reranking. "
-                "Install with: pip install sentence-transformers"
-            )
         if self._model is None:
-            self._model = CrossEncoder(self.model_name)
+            self._model = load_cross_encoder(self.model_name)
         return self._model
 
-    def rerank(
+    def rerank_indices(
         self, query: str, documents: list[str], top_k: int | None = None
-    ) -> list[tuple[str, float]]:
-        """Rerank documents based on relevance to query.
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Rank documents by relevance, returning positions instead of texts.
+
+        Lets callers map results back to their own objects by index rather
+        than by document text.
 
         Args:
             query: Search query.
@@ -62,20 +129,47 @@ class Reranker:
             top_k: Number of top results to return. Defaults to settings value.
 
         Returns:
-            List of (document, score) tuples sorted by relevance.
+            Tuple of (indices into documents, scores), best first.
         """
         if not documents:
-            return []
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
 
         top_k = top_k or settings.RERANK_TOP_K
 
-        pairs = [[query, doc] for doc in documents]
-        scores = self.model.predict(pairs)
+        # Scores come back as one stacked tensor (a single device-to-host
+        # copy) rather than being converted to numpy one by one
+        scores = (
+            self.model.predict(
+                [(query, doc) for doc in documents],
+                show_progress_bar=False,
+                convert_to_tensor=True,
+            )
+            .float()
+            .cpu()
+            .numpy()
+        )
 
-        scored_docs = list(zip(documents, scores.tolist(), strict=False))
-        scored_docs.sort(key=lambda x: x[1], reverse=True)
+        order = top_k_indices(scores, top_k)
+        return order, scores[order]
 
-        return scored_docs[:top_k]
+    def rerank(
+        self, query: str, documents: list[str], top_k: int | None = None
+    ) -> list[tuple[str, float]]:
+        """Rerank documents based on relevance to query.
+
+        Args:
+            query: Search query.
+            documents: List of document texts to rerank.
+            top_k: Number of top results to return. Defaults to settings value.
+
+        Returns:
+            List of (document, score) tuples sorted by relevance.
+        """
+        order, scores = self.rerank_indices(query, documents, top_k)
+        return [
+            (documents[idx], score)
+            for idx, score in zip(order, scores.tolist(), strict=True)
+        ]
 
 
 class RetrievalEngine:
@@ -93,11 +187,13 @@ class RetrievalEngine:
             embedding_model: Embedding model instance.
         """
         self.persist_directory = persist_directory or settings.CHROMA_DIR
-        self.embedding_model = embedding_model or EmbeddingModel()
 
         # Initialize LangChain embeddings wrapper
-        self.langchain_embeddings = HuggingFaceEmbeddings(
-            model_name=settings.EMBEDDING_MODEL
+        self.langchain_embeddings = get_embeddings()
+
+        # Wrap the same SentenceTransformer rather than loading it twice
+        self.embedding_model = embedding_model or EmbeddingModel(
+            model=self.langchain_embeddings.client
         )
         self._vectordb: Chroma | None = None
 
@@ -105,9 +201,9 @@ class RetrievalEngine:
     def vectordb(self) -> Chroma:
         """Get or create the vector database."""
         if self._vectordb is None:
-            self._vectordb = Chroma(
-                persist_directory=self.persist_directory,
+            self._vectordb = create_vectordb(
                 embedding_function=self.langchain_embeddings,
+                persist_directory=self.persist_directory,
             )
         return self._vectordb
 
@@ -116,9 +212,12 @@ class RetrievalEngine:
 
         Args:
             documents: List of Document objects to add.
+
+        Note:
+            Chroma (>= 0.4) persists writes itself; there is no separate
+            persist step to run or defer.
         """
         self.vectordb.add_documents(documents)
-        self.vectordb.persist()
 
     def similarity_search(
         self, query: str, k: int | None = None, rerank: bool = False
@@ -139,19 +238,26 @@ class RetrievalEngine:
             query, k=k * 2 if rerank else k
         )
 
-        if rerank:
+        # As in AdvancedRetriever.retrieve, the cross-encoder only runs when
+        # there are more candidates than results to return
+        if rerank and len(results) > k:
             reranker = Reranker()
-            doc_texts = [doc.page_content for doc in results]
-            reranked = reranker.rerank(query, doc_texts, top_k=k)
-
-            # Map back to documents
-            text_to_doc = {doc.page_content: doc for doc in results}
-            results = [
-                text_to_doc[text]
-                for text, _ in reranked
-                if text in text_to_doc
+            # Duplicate chunks are scored once and share the score; every
+            # occurrence stays a candidate
+            text_index: dict[str, int] = {}
+            positions = [
+                text_index.setdefault(doc.page_content, len(text_index))
+                for doc in results
             ]
 
+            order, ordered_scores = reranker.rerank_indices(
+                query, list(text_index), top_k=len(text_index)
+            )
+            distinct_scores = np.empty(len(text_index), dtype=np.float32)
+            distinct_scores[order] = ordered_scores
+            scores = distinct_scores[positions]
+            results = [results[idx] for idx in top_k_indices(scores, k)]
+
         return results[:k]
 
 
@@ -169,6 +275,24 @@ class AdvancedRetriever:
         self.reranker_model = reranker_model
         self._reranker = None
 
+        # Shared across concurrent retrieve() calls when batching is enabled
+        self._rerank_batcher: MicroBatcher | None = None
+        if reranker_model is not None and settings.ENABLE_RERANK_BATCHING:
+            self._rerank_batcher = MicroBatcher(
+                self._predict_pairs,
+                max_batch_size=settings.RERANK_BATCH_SIZE,
+                max_wait_ms=settings.RERANK_BATCH_WAIT_MS,
+                name="rerank-batcher",
+            )
+
+        # Cross-encoder scores keyed by (query, document content hash)
+        self._score_cache: LRUCache | None = None
+        if reranker_model is not None and settings.RERANK_SCORE_CACHE_SIZE > 0:
+            self._score_cache = LRUCache(
+                maxsize=settings.RERANK_SCORE_CACHE_SIZE
+            )
+        self._score_cache_lock = threading.Lock()
+
     @property
     def reranker(self):
         """Lazy load the reranker model.
@@ -183,20 +307,76 @@ class AdvancedRetriever:
             return None
 
         if self._reranker is None:
-            if CrossEncoder is None:
-                raise ImportError(
-                    "sentence-transformers is required for reranking. "
-                    "Install with: pip install sentence-transformers"
-                )
-            self._reranker = CrossEncoder(self.reranker_model, max_length=512)
+            self._reranker = load_cross_encoder(
+                self.reranker_model, max_length=512
+            )
         return self._reranker
 
+    def _predict_pairs(self, pairs: list[tuple[str, str]]) -> Any:
+        """Score query-document pairs in one cross-encoder call.
+
+        Args:
+            pairs: (query, document) pairs, possibly from several queries.
+
+        Returns:
+            Array of relevance scores aligned with pairs.
+        """
+        return self.reranker.predict(
+            pairs, batch_size=settings.RERANK_BATCH_SIZE
+        )
+
+    def _score_uncached(self, pairs: list[tuple[str, str]]) -> Any:
+        """Score pairs, coalescing with concurrent queries if enabled.
+
+        Args:
+            pairs: (query, document) pairs for a single query.
+
+        Returns:
+            Array of relevance scores aligned with pairs.
+        """
+        if self._rerank_batcher is not None:
+            return self._rerank_batcher.submit(pairs)
+        return self._predict_pairs(pairs)
+
+    def _score_pairs(self, pairs: list[tuple[str, str]]) -> Any:
+        """Score pairs, reusing cached scores of previously seen pairs.
+
+        Only pairs missing from the score cache reach the cross-encoder.
+
+        Args:
+            pairs: (query, document) pairs for a single query.
+
+        Returns:
+            Array of relevance scores aligned with pairs.
+        """
+        if self._score_cache is None:
+            return self._score_uncached(pairs)
+
+        keys = [
+            (query, xxhash.xxh3_128_intdigest(doc_text.encode("utf-8")))
+            for query, doc_text in pairs
+        ]
+        with self._score_cache_lock:
+            scores = [self._score_cache.get(key) for key in keys]
+
+        misses = [idx for idx, score in enumerate(scores) if score is None]
+        if misses:
+            fresh = np.asarray(
+                self._score_uncached([pairs[idx] for idx in misses])
+            ).tolist()
+            with self._score_cache_lock:
+                for idx, score in zip(misses, fresh, strict=True):
+                    scores[idx] = self._score_cache[keys[idx]] = score
+
+        return np.asarray(scores)
+
     def retrieve(
         self,
         query: str,
         top_k: int = 5,
         rerank_top_k: int | None = None,
         filters: dict | None = None,
+        query_embedding: list[float] | None = None,
     ) -> list[Document]:
         """Retrieve documents with optional reranking.
 
@@ -206,6 +386,8 @@ class AdvancedRetriever:
             rerank_top_k: Number of candidates to retrieve before reranking.
                 If None, uses top_k. Only used if reranker is enabled.
             filters: Optional metadata filters for similarity search.
+            query_embedding: Embedding of query, if the caller already
+                computed it; the vector store then does not embed it again.
 
         Returns:
             List of retrieved documents, optionally reranked.
@@ -217,22 +399,31 @@ class AdvancedRetriever:
             k = top_k
 
         # Perform similarity search
-        results = self.vectordb.similarity_search(query, k=k, filter=filters)
+        if query_embedding is not None:
+            results = self.vectordb.similarity_search_by_vector(
+                query_embedding, k=k, filter=filters
+            )
+        else:
+            results = self.vectordb.similarity_search(
+                query, k=k, filter=filters
+            )
 
         # Apply reranking if reranker is available and we have more results than needed
         if self.reranker is not None and len(results) > top_k:
-            # Extract document texts
-            doc_texts = [doc.page_content for doc in results]
-
-            # Score query-document pairs: [query, doc.page_content]
-            pairs = [[query, doc_text] for doc_text in doc_texts]
-            scores = self.reranker.predict(pairs)
+            # Index distinct document texts; duplicate chunks (e.g. from
+            # overlapping splits) are scored once and share the score
+            text_index: dict[str, int] = {}
+            positions = [
+                text_index.setdefault(doc.page_content, len(text_index))
+                for doc in results
+            ]
 
-            # Sort by score (descending) using numpy and return top_k
-            indices = np.argsort(scores)[::-1]  # Descending order
-            sorted_results = [results[i] for i in indices[:top_k]]
+            # Score query-document pairs: (query, doc.page_content)
+            pairs = [(query, doc_text) for doc_text in text_index]
+            scores = np.asarray(self._score_pairs(pairs))[positions]
 
-            return sorted_results
+            # Select and sort only the top_k scores (descending)
+            return [results[i] for i in top_k_indices(scores, top_k)]
 
         return results[:top_k]
 
@@ -256,8 +447,18 @@ class AdvancedRetriever:
                 query, k=top_k
             )
 
-            # Convert to list of tuples and ensure scores are floats
-            return [(doc, float(score)) for doc, score in results_with_scores]
+            if not results_with_scores:
+                return []
+
+            # Convert scores to Python floats in one vectorized pass
+            docs, scores = zip(*results_with_scores, strict=True)
+            return list(
+                zip(
+                    docs,
+                    np.asarray(scores, dtype=np.float64).tolist(),
+                    strict=True,
+                )
+            )
         except Exception as e:
             raise RetrievalError(f"Failed to retrieve with scores: {e}") from e
 
@@ -0,0 +1,97 @@
+"""
+Similarity cache for answers to near-duplicate queries.
+Matches a query embedding against recently answered queries so the
+retrieval and generation work can be skipped for repeated questions.
+"""
+
+import threading
+from collections.abc import Hashable, Sequence
+from typing import Any
+
+import numpy as np
+
+# Key of slots that hold no entry yet; never equal to a lookup key
+_EMPTY = object()
+
+
+class SemanticCache:
+    """Fixed-size FIFO cache keyed by query embedding similarity.
+
+    Embeddings are L2-normalized and kept as rows of one float32 matrix,
+    so a lookup is a single matrix-vector product. Entries also carry a
+    key (e.g. generation settings) that must match exactly.
+    """
+
+    def __init__(self, maxsize: int = 128, threshold: float = 0.95):
+        """Initialize semantic cache.
+
+        Args:
+            maxsize: Maximum number of entries; the oldest is evicted.
+            threshold: Minimum cosine similarity for a cache hit.
+        """
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._matrix: np.ndarray | None = None
+        self._keys: list[Any] = [_EMPTY] * maxsize
+        self._values: list[Any] = [None] * maxsize
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(embedding: Sequence[float] | np.ndarray) -> np.ndarray:
+        """Convert an embedding to an L2-normalized float32 vector.
+
+        Args:
+            embedding: Query embedding.
+
+        Returns:
+            Unit-length float32 vector (unchanged if all zeros).
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding: np.ndarray, key: Hashable = None) -> Any | None:
+        """Find the value of the most similar cached query.
+
+        Args:
+            embedding: Normalized query embedding (see normalize).
+            key: Key that the cached entry must have been stored with.
+
+        Returns:
+            Cached value, or None if no entry with this key reaches the
+            similarity threshold.
+        """
+        with self._lock:
+            if self._matrix is None:
+                return None
+            similarities = self._matrix @ embedding
+            best = max(
+                (idx for idx, k in enumerate(self._keys) if k == key),
+                key=similarities.__getitem__,
+                default=None,
+            )
+            if best is None or similarities[best] < self.threshold:
+                return None
+            return self._values[best]
+
+    def put(
+        self, embedding: np.ndarray, value: Any, key: Hashable = None
+    ) -> None:
+        """Store a value, evicting the oldest entry when full.
+
+        Args:
+            embedding: Normalized query embedding (see normalize).
+            value: Value to return for similar queries.
+            key: Key that lookups must match.
+        """
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros(
+                    (self.maxsize, embedding.shape[0]), dtype=np.float32
+                )
+            slot = self._next
+            self._matrix[slot] = embedding
+            self._keys[slot] = key
+            self._values[slot] = value
+            self._next = (slot + 1) % self.maxsize
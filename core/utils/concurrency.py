@@ -0,0 +1,41 @@
+"""
+Bounded fan-out helpers for executor-based pipelines.
+Keeps a fixed number of tasks in flight so streaming producers are not
+drained into memory up front, as Executor.map does.
+"""
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future
+from typing import Any
+
+
+def map_bounded(
+    executor: Executor,
+    fn: Callable[..., Any],
+    *iterables: Iterable[Any],
+    max_pending: int,
+) -> Iterator[Any]:
+    """Like Executor.map, but with at most max_pending tasks submitted.
+
+    Inputs are pulled from the iterables only as results are consumed, and
+    results are yielded in input order.
+
+    Args:
+        executor: Executor running the tasks.
+        fn: Function called with one item from each iterable.
+        *iterables: Argument iterables, zipped as in map(): iteration
+            stops at the shortest one (zip with strict=False).
+        max_pending: Maximum number of submitted, unconsumed tasks.
+
+    Yields:
+        fn's results in input order; a task's exception is raised when its
+        result is reached.
+    """
+    pending: deque[Future] = deque()
+    for args in zip(*iterables, strict=False):
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, *args))
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,138 @@
+"""
+ChromaDB vector store construction and index warm-up.
+Opens the persistent Chroma client with explicit HNSW parameters and
+prefetches index files into the page cache before the first query.
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import chromadb
+
+from config import settings
+from core.utils.imports import import_langchain_chroma
+
+Chroma = import_langchain_chroma()
+logger = logging.getLogger(__name__)
+
+# Marker file in the ChromaDB directory, replaced after every ingest
+INDEX_VERSION_FILE = "index_version"
+
+
+def hnsw_collection_metadata() -> dict[str, Any]:
+    """Build Chroma collection metadata carrying the HNSW index parameters.
+
+    Returns:
+        Metadata dictionary understood by Chroma when creating a collection.
+
+    Note:
+        Chroma applies these parameters when the collection is created;
+        existing collections keep theirs until the index is rebuilt.
+    """
+    return {
+        "hnsw:construction_ef": settings.HNSW_CONSTRUCTION_EF,
+        "hnsw:M": settings.HNSW_M,
+        "hnsw:search_ef": settings.HNSW_SEARCH_EF,
+    }
+
+
+def create_vectordb(
+    embedding_function: Any, persist_directory: str | None = None
+) -> Chroma:
+    """Open (or create) the persistent Chroma collection.
+
+    Args:
+        embedding_function: LangChain embeddings used for queries and inserts.
+        persist_directory: ChromaDB directory. Defaults to settings.CHROMA_DIR.
+
+    Returns:
+        LangChain Chroma wrapper bound to a PersistentClient.
+    """
+    client = chromadb.PersistentClient(
+        path=persist_directory or settings.CHROMA_DIR
+    )
+    return Chroma(
+        client=client,
+        collection_name=settings.CHROMA_COLLECTION,
+        embedding_function=embedding_function,
+        collection_metadata=hnsw_collection_metadata(),
+    )
+
+
+def stamp_index_version(persist_directory: str | None = None) -> None:
+    """Mark the index as changed, invalidating caches keyed on its version.
+
+    The marker is written to a temporary file and renamed into place, so
+    every stamp gets a new inode even where mtimes are coarse.
+
+    Args:
+        persist_directory: ChromaDB directory. Defaults to settings.CHROMA_DIR.
+    """
+    root = Path(persist_directory or settings.CHROMA_DIR)
+    marker = root / INDEX_VERSION_FILE
+    tmp = marker.with_name(f"{marker.name}.{os.getpid()}.tmp")
+    tmp.write_text(f"{time.time_ns()}\n")
+    os.replace(tmp, marker)
+
+
+def read_index_version(
+    persist_directory: str | None = None,
+) -> tuple[int, int] | None:
+    """Identify the current index contents (see stamp_index_version).
+
+    A single stat call, cheap enough to run per request.
+
+    Args:
+        persist_directory: ChromaDB directory. Defaults to settings.CHROMA_DIR.
+
+    Returns:
+        (inode, mtime in ns) of the marker file, or None if no ingest has
+        stamped the directory.
+    """
+    root = Path(persist_directory or settings.CHROMA_DIR)
+    marker = root / INDEX_VERSION_FILE
+    try:
+        marker_stat = os.stat(marker)
+    except OSError:
+        return None
+    return marker_stat.st_ino, marker_stat.st_mtime_ns
+
+
+def prefetch_index_files(persist_directory: str | None = None) -> int:
+    """Ask the kernel to read the Chroma SQLite and HNSW files ahead of use.
+
+    HNSW segments are memory-mapped lazily, so without this the first query
+    page-faults its way through the graph.
+
+    Args:
+        persist_directory: ChromaDB directory. Defaults to settings.CHROMA_DIR.
+
+    Returns:
+        Number of files advised. Zero if the platform lacks posix_fadvise
+        or the directory does not exist.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return 0
+
+    root = Path(persist_directory or settings.CHROMA_DIR)
+    if not root.is_dir():
+        return 0
+
+    advised = 0
+    for file_path in root.rglob("*"):
+        if not file_path.is_file():
+            continue
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                advised += 1
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.debug(f"Could not prefetch {file_path}: {e}")
+
+    return advised
@@ -4,8 +4,272 @@ Handles tokenization, device placement, and streaming output
 for conversational responses based on retrieved context.
 """
 
+import copy
+import logging
+import threading
 from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Any
+from weakref import WeakKeyDictionary
+
+import torch
+
+from config import IS_DEV, settings
+
+from .prompt_manager import PromptManager
+
+try:
+    from transformers import (
+        StoppingCriteria,
+        StoppingCriteriaList,
+        TextIteratorStreamer,
+    )
+except ImportError:
+    StoppingCriteria = object
+    StoppingCriteriaList = TextIteratorStreamer = None
+
+logger = logging.getLogger(__name__)
+
+# Device each model was moved to by _place (weak: models may be unloaded)
+_MODEL_DEVICES: WeakKeyDictionary = WeakKeyDictionary()
+
+# Per model: (preamble token IDs, KV cache of the preamble), or None when
+# the chat template does not render the preamble as a token prefix
+_PREFIX_CACHES: WeakKeyDictionary = WeakKeyDictionary()
+_prefix_lock = threading.Lock()
+
+# Long-lived workers running generate() for streamed responses, instead
+# of a new thread per request (at most GENERATION_CONCURRENCY at once;
+# the API also counts streams against its /query generation slots)
+_stream_executor = ThreadPoolExecutor(
+    max_workers=settings.GENERATION_CONCURRENCY or None,
+    thread_name_prefix="generation-stream",
+)
+
+
+def _uses_cache_implementation(device: str) -> bool:
+    """Whether generate() runs with the configured KV cache strategy.
+
+    Args:
+        device: Device string ("cpu", "cuda", etc.).
+
+    Returns:
+        True on GPU (outside dev mode) when KV_CACHE_IMPLEMENTATION is set.
+    """
+    return (
+        device != "cpu"
+        and not IS_DEV
+        and bool(settings.KV_CACHE_IMPLEMENTATION)
+    )
+
+
+@contextmanager
+def _inference_context(device: str) -> Iterator[None]:
+    """Inference mode plus, on CPU, optional bfloat16 autocast.
+
+    Args:
+        device: Device string ("cpu", "cuda", etc.).
+    """
+    on_cpu = device == "cpu"
+    with (
+        torch.inference_mode(),
+        torch.autocast(
+            "cpu",
+            dtype=torch.bfloat16,
+            enabled=on_cpu and settings.CPU_BF16_AUTOCAST,
+        ),
+    ):
+        yield
+
+
+def _generate(model: Any, device: str, **generate_kwargs: Any) -> Any:
+    """Run model.generate with the device-specific cache and precision.
+
+    Args:
+        model: Model instance.
+        device: Device string ("cpu", "cuda", etc.).
+        **generate_kwargs: Keyword arguments forwarded to model.generate.
+
+    Returns:
+        Output of model.generate.
+
+    Note:
+        On GPU the KV cache strategy comes from KV_CACHE_IMPLEMENTATION
+        (a static cache avoids per-token reallocations). On CPU, bfloat16
+        autocast is applied when CPU_BF16_AUTOCAST is enabled.
+    """
+    if _uses_cache_implementation(device):
+        generate_kwargs.setdefault(
+            "cache_implementation", settings.KV_CACHE_IMPLEMENTATION
+        )
+
+    with _inference_context(device):
+        return model.generate(**generate_kwargs)
+
+
+class _StopOnEvent(StoppingCriteria):
+    """Stop generation once an event is set (e.g. the consumer is gone)."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids: Any, scores: Any, **kwargs: Any) -> Any:
+        return torch.full(
+            (input_ids.shape[0],),
+            self.event.is_set(),
+            dtype=torch.bool,
+            device=input_ids.device,
+        )
+
+
+def _generate_streamed(
+    model: Any, device: str, streamer: Any, **generate_kwargs: Any
+) -> Any:
+    """Run _generate for a streamer, ending the stream if it fails.
+
+    generate() only ends the streamer on success; without this, a failed
+    generation (e.g. CUDA out of memory) leaves the consumer iterating
+    the streamer waiting forever.
+
+    Args:
+        model: Model instance.
+        device: Device string ("cpu", "cuda", etc.).
+        streamer: TextIteratorStreamer receiving the tokens.
+        **generate_kwargs: Keyword arguments forwarded to model.generate.
+
+    Returns:
+        Output of model.generate.
+    """
+    try:
+        return _generate(model, device, streamer=streamer, **generate_kwargs)
+    except BaseException:
+        streamer.end()
+        raise
+
+
+def _prefix_kv_cache(
+    tokenizer: Any, model: Any, input_ids: Any, device: str
+) -> dict[str, Any]:
+    """KV cache of the fixed prompt preamble, if the prompt starts with it.
+
+    Every RAG prompt opens with the same system prompt and few-shot turns
+    (PromptManager.render_preamble). Their KV cache is computed once per
+    model; each call gets a copy, so generate() only prefills the
+    variable part of the prompt.
+
+    Args:
+        tokenizer: Tokenizer instance.
+        model: Model instance, already placed on its device.
+        input_ids: Tokenized prompt, on the model's input device.
+        device: Device string ("cpu", "cuda", etc.).
+
+    Returns:
+        {"past_key_values": cache} to pass to generate(), or an empty dict
+        when PREFIX_KV_CACHE is off, a cache_implementation is in use,
+        the model is not a PyTorch module (e.g. ONNX Runtime), or the
+        prompt does not start with the preamble tokens.
+    """
+    if (
+        not settings.PREFIX_KV_CACHE
+        or _uses_cache_implementation(device)
+        or not isinstance(model, torch.nn.Module)
+    ):
+        return {}
+
+    with _prefix_lock:
+        if model not in _PREFIX_CACHES:
+            _PREFIX_CACHES[model] = _build_prefix_cache(
+                tokenizer, model, input_ids.device, device
+            )
+        entry = _PREFIX_CACHES[model]
+
+    if entry is None:
+        return {}
+    prefix_ids, cache = entry
+    prefix_length = prefix_ids.shape[1]
+    if input_ids.shape[1] <= prefix_length or not torch.equal(
+        input_ids[:, :prefix_length], prefix_ids
+    ):
+        return {}
+
+    with torch.inference_mode():
+        return {"past_key_values": copy.deepcopy(cache)}
+
+
+def _build_prefix_cache(
+    tokenizer: Any, model: Any, input_device: Any, device: str
+) -> tuple[Any, Any] | None:
+    """Run the preamble through the model once.
+
+    Args:
+        tokenizer: Tokenizer instance.
+        model: Model instance.
+        input_device: Device the prompt tensors live on.
+        device: Device string ("cpu", "cuda", etc.).
+
+    Returns:
+        Tuple of (preamble token IDs, KV cache), or None if the tokenizer
+        has no chat template.
+    """
+    try:
+        preamble = PromptManager.render_preamble(tokenizer)
+    except (AttributeError, ValueError) as exc:
+        logger.warning(f"Prefix KV cache disabled: {exc}")
+        return None
+
+    prefix_ids = tokenizer(preamble, return_tensors="pt")["input_ids"].to(
+        input_device
+    )
+    with _inference_context(device):
+        cache = model(input_ids=prefix_ids, use_cache=True).past_key_values
+    return prefix_ids, cache
+
+
+def _input_device(model: Any, device: str) -> str:
+    """Device that model inputs must be placed on.
+
+    Args:
+        model: Model instance.
+        device: Fallback device string if the model has no parameters.
+
+    Returns:
+        Device of the model's first parameter, else the fallback.
+    """
+    try:
+        return str(next(iter(model.parameters())).device)
+    except (StopIteration, AttributeError):
+        return device
+
+
+def _place(model: Any, inputs: Any, device: str) -> tuple[Any, Any]:
+    """Put the inputs, and the model if needed, on the generation device.
+
+    Models dispatched with a device map keep their placement and receive
+    inputs on their first parameter's device. Other models are moved to
+    device once; later calls skip model.to(), which walks every parameter.
+
+    Args:
+        model: Model instance.
+        inputs: Tokenizer output (BatchEncoding).
+        device: Device string ("cpu", "cuda", etc.).
+
+    Returns:
+        Tuple of (model, inputs) placed for generation.
+    """
+    has_device_map = hasattr(model, "hf_device_map") or (
+        hasattr(model, "device") and str(model.device) != "cpu"
+    )
+
+    if has_device_map:
+        target = _input_device(model, device)
+    else:
+        target = device
+        if _MODEL_DEVICES.get(model) != device and hasattr(model, "to"):
+            model = model.to(device)
+            _MODEL_DEVICES[model] = device
+
+    return model, inputs.to(target)
 
 
 def generate_response(
@@ -35,55 +299,28 @@ def generate_response(
         Moves tensors to specified device, performs deterministic cleanup,
         and strips special tokens from output.
     """
-    import torch
-
     # Tokenize prompt
     inputs = tokenizer(prompt, return_tensors="pt")
 
-    # Move inputs to device
-    # Check if device_map="auto" is being used (model handles device automatically)
-    has_device_map = hasattr(model, "hf_device_map") or (
-        hasattr(model, "device") and str(model.device) != "cpu"
+    # Move inputs (and, once, the model) to the device
+    model, inputs = _place(model, inputs, device)
+
+    # Generate response (inference mode is entered inside _generate)
+    outputs = _generate(
+        model,
+        device,
+        **inputs,
+        **_prefix_kv_cache(tokenizer, model, inputs["input_ids"], device),
+        max_new_tokens=max_new_tokens,
+        do_sample=True,
+        temperature=temperature,
+        top_p=top_p,
+        pad_token_id=tokenizer.eos_token_id,
     )
 
-    if has_device_map:
-        # Model manages device placement automatically
-        # Put inputs on the device of the first parameter
-        try:
-            first_param = next(iter(model.parameters()))
-            input_device = str(first_param.device)
-            inputs = {k: v.to(input_device) for k, v in inputs.items()}
-        except StopIteration:
-            # Fallback: use provided device
-            inputs = {k: v.to(device) for k, v in inputs.items()}
-    elif device != "cpu":
-        # Single GPU: move inputs to device
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-        if hasattr(model, "to"):
-            model = model.to(device)
-    else:
-        # CPU: ensure inputs and model are on CPU
-        inputs = {k: v.to("cpu") for k, v in inputs.items()}
-        torch.set_num_threads(6)
-        if hasattr(model, "to"):
-            model = model.to("cpu")
-
-    # Generate response
-    with (
-        torch.no_grad()
-    ):  # Deterministic cleanup: disable gradient computation
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=max_new_tokens,
-            do_sample=True,
-            temperature=temperature,
-            top_p=top_p,
-            pad_token_id=tokenizer.eos_token_id,
-        )
-
     # Extract only the newly generated tokens (not the input prompt)
     input_length = inputs["input_ids"].shape[1]
-    generated_ids = outputs[0][input_length:]
+    generated_ids = outputs[0, input_length:]
 
     # Decode only the newly generated tokens
     generated_text = tokenizer.decode(generated_ids, skip_special_tokens=True)
@@ -91,6 +328,116 @@ def generate_response(
     return generated_text.strip()
 
 
+def tokenize_prompt(tokenizer: Any, prompt: str) -> list[int]:
+    """Tokenize a prompt ahead of generation.
+
+    Lets request threads tokenize in parallel so that a shared batching
+    worker only pads and generates.
+
+    Args:
+        tokenizer: Tokenizer instance.
+        prompt: Input prompt text.
+
+    Returns:
+        Input token IDs.
+    """
+    return tokenizer(prompt)["input_ids"]
+
+
+def generate_batch(
+    tokenizer: Any,
+    model: Any,
+    input_ids: list[list[int]],
+    max_new_tokens: int,
+    temperature: float,
+    top_p: float,
+    device: str,
+) -> list[str]:
+    """Generate responses for several prompts in one model.generate call.
+
+    Args:
+        tokenizer: Tokenizer instance.
+        model: Model instance.
+        input_ids: Tokenized prompts (see tokenize_prompt).
+        max_new_tokens: Maximum number of new tokens to generate.
+        temperature: Sampling temperature.
+        top_p: Nucleus sampling parameter.
+        device: Device string ("cpu", "cuda", etc.).
+
+    Returns:
+        Generated texts, one per prompt, with special tokens stripped.
+
+    Note:
+        Prompts are left-padded so every row's new tokens start at the
+        same position.
+    """
+    if tokenizer.pad_token_id is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    inputs = tokenizer.pad(
+        {"input_ids": input_ids},
+        padding=True,
+        padding_side="left",
+        return_tensors="pt",
+    )
+    inputs = inputs.to(_input_device(model, device))
+
+    outputs = _generate(
+        model,
+        device,
+        **inputs,
+        max_new_tokens=max_new_tokens,
+        do_sample=True,
+        temperature=temperature,
+        top_p=top_p,
+        pad_token_id=tokenizer.pad_token_id,
+    )
+
+    input_length = inputs["input_ids"].shape[1]
+    generated_texts = tokenizer.batch_decode(
+        outputs[:, input_length:], skip_special_tokens=True
+    )
+    return [text.strip() for text in generated_texts]
+
+
+def generate_grouped(
+    tokenizer: Any,
+    model: Any,
+    requests: list[tuple[list[int], dict[str, Any]]],
+    device: str,
+) -> list[str]:
+    """Generate for mixed requests, batching those with equal parameters.
+
+    Args:
+        tokenizer: Tokenizer instance.
+        model: Model instance.
+        requests: (input_ids, params) pairs; input_ids come from
+            tokenize_prompt and params holds max_new_tokens, temperature
+            and top_p.
+        device: Device string ("cpu", "cuda", etc.).
+
+    Returns:
+        Generated texts aligned with requests.
+    """
+    groups: dict[tuple, list[int]] = {}
+    for idx, (_, params) in enumerate(requests):
+        groups.setdefault(tuple(sorted(params.items())), []).append(idx)
+
+    answers: list[str] = [""] * len(requests)
+    for indices in groups.values():
+        params = requests[indices[0]][1]
+        texts = generate_batch(
+            tokenizer=tokenizer,
+            model=model,
+            input_ids=[requests[idx][0] for idx in indices],
+            device=device,
+            **params,
+        )
+        for idx, text in zip(indices, texts, strict=True):
+            answers[idx] = text
+    return answers
+
+
 def generate_response_streaming(
     tokenizer: Any,
     model: Any,
@@ -99,6 +446,7 @@ def generate_response_streaming(
     temperature: float,
     top_p: float,
     device: str,
+    stop_event: threading.Event | None = None,
 ) -> Iterator[str]:
     """Generate response with streaming support.
 
@@ -110,6 +458,9 @@ def generate_response_streaming(
         temperature: Sampling temperature.
         top_p: Nucleus sampling parameter.
         device: Device string ("cpu", "cuda", etc.).
+        stop_event: Optional event that stops generation at the next token
+            when set. It is also set when the generator is closed, so an
+            abandoned stream frees its worker.
 
     Yields:
         Generated text chunks (incremental).
@@ -118,44 +469,27 @@ def generate_response_streaming(
         Moves tensors to specified device, performs deterministic cleanup,
         and strips special tokens from output.
     """
-    import threading
-
-    import torch
+    if stop_event is None:
+        stop_event = threading.Event()
 
     # Tokenize prompt
     inputs = tokenizer(prompt, return_tensors="pt")
 
-    # Move inputs to device
-    has_device_map = hasattr(model, "hf_device_map") or (
-        hasattr(model, "device") and str(model.device) != "cpu"
-    )
-
-    if has_device_map:
-        try:
-            first_param = next(iter(model.parameters()))
-            input_device = str(first_param.device)
-            inputs = {k: v.to(input_device) for k, v in inputs.items()}
-        except StopIteration:
-            inputs = {k: v.to(device) for k, v in inputs.items()}
-    elif device != "cpu":
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-        if hasattr(model, "to"):
-            model = model.to(device)
-    else:
-        inputs = {k: v.to("cpu") for k, v in inputs.items()}
-        torch.set_num_threads(6)
-        if hasattr(model, "to"):
-            model = model.to("cpu")
+    # Move inputs (and, once, the model) to the device
+    model, inputs = _place(model, inputs, device)
 
     # Try to use TextIteratorStreamer if available
     try:
-        from transformers import TextIteratorStreamer
+        if TextIteratorStreamer is None:
+            raise ImportError("TextIteratorStreamer is not available")
 
         streamer = TextIteratorStreamer(
             tokenizer, skip_prompt=True, skip_special_tokens=True
         )
 
         generation_kwargs = {
+            "model": model,
+            "device": device,
             **inputs,
             "max_new_tokens": max_new_tokens,
             "do_sample": True,
@@ -163,35 +497,35 @@ def generate_response_streaming(
             "top_p": top_p,
             "pad_token_id": tokenizer.eos_token_id,
             "streamer": streamer,
+            "stopping_criteria": StoppingCriteriaList(
+                [_StopOnEvent(stop_event)]
+            ),
+            **_prefix_kv_cache(tokenizer, model, inputs["input_ids"], device),
         }
 
-        # Generate in a separate thread
-        generation_thread = threading.Thread(
-            target=model.generate, kwargs=generation_kwargs
+        # Generate on a stream worker thread
+        generation = _stream_executor.submit(
+            _generate_streamed, **generation_kwargs
         )
-        generation_thread.start()
-
-        # Yield tokens as they come
-        yield from streamer
-
-        generation_thread.join()
 
     except (ImportError, AttributeError):
         # Fallback: generate all at once and simulate streaming
         # This is less ideal but works if TextIteratorStreamer is not available
-        with torch.no_grad():
-            outputs = model.generate(
-                **inputs,
-                max_new_tokens=max_new_tokens,
-                do_sample=True,
-                temperature=temperature,
-                top_p=top_p,
-                pad_token_id=tokenizer.eos_token_id,
-            )
+        outputs = _generate(
+            model,
+            device,
+            **inputs,
+            **_prefix_kv_cache(tokenizer, model, inputs["input_ids"], device),
+            max_new_tokens=max_new_tokens,
+            do_sample=True,
+            temperature=temperature,
+            top_p=top_p,
+            pad_token_id=tokenizer.eos_token_id,
+        )
 
         # Extract only the newly generated tokens (not the input prompt)
         input_length = inputs["input_ids"].shape[1]
-        generated_ids = outputs[0][input_length:]
+        generated_ids = outputs[0, input_length:]
 
         # Decode only the newly generated tokens
         generated_text = tokenizer.decode(
@@ -205,3 +539,12 @@ def generate_response_streaming(
         chunk_size = 5  # characters per chunk
         for i in range(0, len(generated_text), chunk_size):
             yield generated_text[i : i + chunk_size]
+        return
+
+    # Yield tokens as they come, then re-raise any generation error here
+    # (outside the fallback's except, so a failure is not regenerated)
+    try:
+        yield from streamer
+    finally:
+        stop_event.set()
+    generation.result()
@@ -0,0 +1,79 @@
+"""
+Out-of-process language model generation.
+Runs the model in a dedicated worker process so Python-side decoding
+work does not contend for the API process's GIL.
+"""
+
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+from config import settings
+from llm.generation import generate_response
+from llm.model_manager import ModelManager
+
+# Worker-process state, set by _init_worker
+_worker_tokenizer: Any | None = None
+_worker_model: Any | None = None
+
+
+def _init_worker(model_path: str) -> None:
+    """Load tokenizer and model once when the worker process starts.
+
+    Args:
+        model_path: Local snapshot directory (see ModelManager.preload).
+    """
+    global _worker_tokenizer, _worker_model
+    _worker_tokenizer, _worker_model = ModelManager(model_path).load_model()
+
+
+def _generate_in_worker(prompt: str, params: dict[str, Any]) -> str:
+    """Generate a response with the worker's resident model.
+
+    Args:
+        prompt: Input prompt text.
+        params: max_new_tokens, temperature and top_p.
+
+    Returns:
+        Generated text.
+    """
+    return generate_response(
+        tokenizer=_worker_tokenizer,
+        model=_worker_model,
+        prompt=prompt,
+        device=settings.DEVICE,
+        **params,
+    )
+
+
+class GenerationPool:
+    """Single-worker process pool holding the model weights."""
+
+    def __init__(self):
+        """Start the worker process (spawned, so CUDA initializes cleanly).
+
+        The model files are fetched here, in the parent process, so the
+        worker loads them from local disk.
+        """
+        self._executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(ModelManager().preload(),),
+        )
+
+    def submit(self, prompt: str, params: dict[str, Any]) -> Future:
+        """Queue a generation in the worker.
+
+        Args:
+            prompt: Input prompt text.
+            params: max_new_tokens, temperature and top_p.
+
+        Returns:
+            Future resolving to the generated text.
+        """
+        return self._executor.submit(_generate_in_worker, prompt, params)
+
+    def shutdown(self) -> None:
+        """Stop the worker process."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -4,6 +4,10 @@ Handles model loading, quantization for development environments,
 and device configuration for CPU and GPU deployments.
 """
 
+import importlib.util
+import os
+import shutil
+from functools import lru_cache
 from typing import Any
 
 from config import IS_DEV, settings
@@ -23,26 +27,134 @@ class ModelManager:
         else:
             self.model_id = model_id or settings.MODEL_ID
 
+    def preload(self) -> str:
+        """Download the model repository into the local Hugging Face cache.
+
+        Run in the parent process before starting workers, which then load
+        from the returned directory without any Hub round-trips.
+
+        Returns:
+            Local snapshot directory, or the model ID unchanged if it is
+            already a local path or the download fails (workers then
+            resolve it themselves).
+        """
+        if os.path.isdir(self.model_id):
+            return self.model_id
+
+        from huggingface_hub import snapshot_download
+
+        try:
+            return snapshot_download(
+                self.model_id,
+                # Formats from_pretrained never reads
+                ignore_patterns=[
+                    "*.gguf",
+                    "*.onnx",
+                    "*.h5",
+                    "*.msgpack",
+                    "original/*",
+                ],
+            )
+        except Exception as e:
+            print(f"[WARNING] Could not preload {self.model_id}: {e}")
+            return self.model_id
+
+    def load_tokenizer(self) -> Any:
+        """Load only the tokenizer.
+
+        Returns:
+            Tokenizer for the configured model, preferring the Rust-backed
+            fast implementation. Loaded once per process and model ID.
+        """
+        return _load_tokenizer_cached(self.model_id)
+
     def load_model(self) -> tuple[Any, Any]:
         """Load tokenizer and model.
 
+        Returns:
+            Tuple of (tokenizer, model), loaded once per process for the
+            model ID and the settings that shape loading; later calls (from
+            any ModelManager) return the same objects.
+        """
+        return _load_model_cached(
+            self.model_id,
+            settings.DEVICE,
+            settings.LOAD_IN_4BIT,
+            settings.LOAD_IN_8BIT,
+            settings.COMPILE_MODEL,
+            settings.ENABLE_ONNX_INT8,
+            settings.ENABLE_IPEX,
+            # Picks the IPEX weight dtype
+            settings.CPU_BF16_AUTOCAST,
+        )
+
+    def _load_tokenizer(self) -> Any:
+        """Read the tokenizer from the Hub cache or disk.
+
+        Returns:
+            Tokenizer for the configured model.
+        """
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(
+            self.model_id, trust_remote_code=True, use_fast=True
+        )
+        if not tokenizer.is_fast:
+            print(
+                f"[WARNING] No fast tokenizer for {self.model_id}; "
+                "falling back to the slow Python tokenizer"
+            )
+        return tokenizer
+
+    def _load_model(self) -> tuple[Any, Any]:
+        """Read the tokenizer and model weights.
+
         Returns:
             Tuple of (tokenizer, model).
 
         Note:
-            Uses device_map="auto" and dtype="auto" when DEVICE != "cpu",
-            otherwise loads on CPU. Sets pad_token_id for generation config.
+            On GPU loads bfloat16 weights (float16 where bf16 is unsupported),
+            or bitsandbytes INT8 weights with LOAD_IN_8BIT, with
+            FlashAttention-2 when flash-attn is installed (else SDPA);
+            otherwise loads on CPU. In dev mode weights are dynamically
+            INT8-quantized, or loaded as NF4 with LOAD_IN_4BIT.
+            CPU production can use an INT8 ONNX Runtime export instead
+            (ENABLE_ONNX_INT8), or optimize the PyTorch model with Intel
+            Extension for PyTorch (ENABLE_IPEX).
+            Sets pad_token_id for generation config and optionally compiles
+            the forward pass.
         """
         import torch
-        from transformers import AutoModelForCausalLM, AutoTokenizer
+        from transformers import AutoModelForCausalLM
 
-        # Load tokenizer
-        tokenizer = AutoTokenizer.from_pretrained(
-            self.model_id, trust_remote_code=True
-        )
+        tokenizer = self.load_tokenizer()
+
+        if IS_DEV or settings.DEVICE == "cpu":
+            # CPU inference threads, set once instead of per generation
+            torch.set_num_threads(6)
 
         # Determine device settings based on dev mode and settings
-        if IS_DEV:
+        if (
+            IS_DEV
+            and settings.LOAD_IN_4BIT
+            and self._has_bitsandbytes("dynamic INT8 quantization")
+        ):
+            from transformers import BitsAndBytesConfig
+
+            print("[DEV MODE] Loading NF4-quantized weights on CPU")
+            model = AutoModelForCausalLM.from_pretrained(
+                self.model_id,
+                trust_remote_code=True,
+                quantization_config=BitsAndBytesConfig(
+                    load_in_4bit=True,
+                    bnb_4bit_quant_type="nf4",
+                    bnb_4bit_use_double_quant=True,
+                    bnb_4bit_compute_dtype=torch.bfloat16,
+                ),
+                device_map="cpu",
+                low_cpu_mem_usage=True,
+            )
+        elif IS_DEV:
             print("[DEV MODE] Using lightweight CPU-optimized model config")
             model = AutoModelForCausalLM.from_pretrained(
                 self.model_id,
@@ -55,30 +167,258 @@ class ModelManager:
                 model, {torch.nn.Linear}, dtype=torch.qint8
             )
         elif settings.DEVICE != "cpu":
-            # from transformers import BitsAndBytesConfig
+            from transformers import BitsAndBytesConfig
 
             print("[PROD MODE] Using full model configuration with GPU")
-            # bnb_config = BitsAndBytesConfig(load_in_8bit=True)
-            model = AutoModelForCausalLM.from_pretrained(
-                self.model_id,
-                trust_remote_code=True,
-                # quantization_config=bnb_config,
-                dtype=(
-                    torch.bfloat16 if torch.cuda.is_available() else "auto"
-                ),
-                device_map="cuda" if torch.cuda.is_available() else "auto",
-            )
+            bnb_config = None
+            if settings.LOAD_IN_8BIT and self._has_bitsandbytes(
+                "half-precision weights"
+            ):
+                # LLM.int8(): outlier features above the threshold stay in
+                # 16-bit, the rest is multiplied in int8
+                bnb_config = BitsAndBytesConfig(
+                    load_in_8bit=True, llm_int8_threshold=6.0
+                )
+            dtype = self._gpu_dtype(torch)
+            gpu_kwargs = {
+                "trust_remote_code": True,
+                "quantization_config": bnb_config,
+                "dtype": dtype,
+                "device_map": self._gpu_device_map(torch),
+            }
+            attn_implementation = self._gpu_attn_implementation(torch, dtype)
+            try:
+                model = AutoModelForCausalLM.from_pretrained(
+                    self.model_id,
+                    attn_implementation=attn_implementation,
+                    **gpu_kwargs,
+                )
+            except (ImportError, ValueError) as e:
+                if attn_implementation == "sdpa":
+                    raise
+                # Architecture or GPU without FlashAttention-2 support
+                print(
+                    f"[WARNING] FlashAttention-2 unavailable ({e}); "
+                    "falling back to SDPA attention"
+                )
+                model = AutoModelForCausalLM.from_pretrained(
+                    self.model_id, attn_implementation="sdpa", **gpu_kwargs
+                )
         else:
-            print("[PROD MODE] Using standard CPU configuration")
-            model = AutoModelForCausalLM.from_pretrained(
-                self.model_id,
-                trust_remote_code=True,
-                dtype="auto",
-                device_map="cpu",
+            model = (
+                self.load_onnx_int8() if settings.ENABLE_ONNX_INT8 else None
             )
+            if model is None:
+                print("[PROD MODE] Using standard CPU configuration")
+                # Allow TF32/bf16-backed matmuls for float32 weights
+                torch.set_float32_matmul_precision("high")
+                model = AutoModelForCausalLM.from_pretrained(
+                    self.model_id,
+                    trust_remote_code=True,
+                    dtype="auto",
+                    device_map="cpu",
+                )
+                if settings.ENABLE_IPEX:
+                    model = self._optimize_with_ipex(model)
 
         # Enable pad_token_id for generation
         if hasattr(model, "generation_config"):
             model.generation_config.pad_token_id = tokenizer.eos_token_id
 
+        if (
+            settings.COMPILE_MODEL
+            and not IS_DEV
+            and isinstance(model, torch.nn.Module)
+            and hasattr(torch, "compile")
+        ):
+            # Compile lazily on first call (the API warmup pays the cost);
+            # pad_token_id is set above so the first trace sees it
+            model.forward = torch.compile(
+                model.forward, mode=self._compile_mode(model)
+            )
+
         return tokenizer, model
+
+    def load_onnx_int8(self) -> Any | None:
+        """Load an INT8-quantized ONNX Runtime export for CPU inference.
+
+        The model is exported to ONNX and its weights are dynamically
+        quantized to INT8 once; later loads read the quantized export
+        from ONNX_DIR.
+
+        Returns:
+            ORTModelForCausalLM, or None if optimum[onnxruntime] is not
+            installed.
+        """
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            from optimum.onnxruntime import ORTModelForCausalLM
+        except ImportError:
+            print(
+                "[WARNING] optimum[onnxruntime] is not installed; falling "
+                "back to PyTorch on CPU. Install with: "
+                "pip install optimum[onnxruntime]"
+            )
+            return None
+
+        export_dir = os.path.join(
+            settings.ONNX_DIR, self.model_id.replace("/", "--")
+        )
+        fp32_dir = os.path.join(export_dir, "fp32")
+        int8_dir = os.path.join(export_dir, "int8")
+
+        if not os.path.isfile(os.path.join(int8_dir, "model.onnx")):
+            print(f"[PROD MODE] Exporting {self.model_id} to ONNX (one-time)")
+            ORTModelForCausalLM.from_pretrained(
+                self.model_id, export=True, trust_remote_code=True
+            ).save_pretrained(fp32_dir)
+            # Configs and generation settings are shared with the export
+            shutil.copytree(
+                fp32_dir,
+                int8_dir,
+                ignore=shutil.ignore_patterns("*.onnx", "*.onnx_data"),
+                dirs_exist_ok=True,
+            )
+            quantize_dynamic(
+                os.path.join(fp32_dir, "model.onnx"),
+                os.path.join(int8_dir, "model.onnx"),
+                weight_type=QuantType.QInt8,
+                use_external_data_format=True,
+            )
+
+        print("[PROD MODE] Using INT8 ONNX Runtime model on CPU")
+        return ORTModelForCausalLM.from_pretrained(int8_dir)
+
+    @staticmethod
+    def _optimize_with_ipex(model: Any) -> Any:
+        """Optimize a CPU model with Intel Extension for PyTorch.
+
+        Args:
+            model: The loaded CPU model.
+
+        Returns:
+            The IPEX-optimized model (bfloat16 weights when
+            CPU_BF16_AUTOCAST is enabled), or the model unchanged if
+            intel-extension-for-pytorch is not installed.
+        """
+        try:
+            import intel_extension_for_pytorch as ipex
+        except ImportError:
+            print(
+                "[WARNING] intel-extension-for-pytorch is not installed; "
+                "using stock PyTorch on CPU. Install with: "
+                "pip install intel-extension-for-pytorch"
+            )
+            return model
+
+        import torch
+
+        dtype = torch.bfloat16 if settings.CPU_BF16_AUTOCAST else None
+        print("[PROD MODE] Optimizing CPU model with IPEX")
+        return ipex.optimize(model.eval(), dtype=dtype, inplace=True)
+
+    @staticmethod
+    def _has_bitsandbytes(fallback: str) -> bool:
+        """Check whether bitsandbytes can be imported.
+
+        Args:
+            fallback: Description of the load path used instead, for the
+                warning.
+
+        Returns:
+            True if bitsandbytes is installed, else False (with a warning).
+        """
+        if importlib.util.find_spec("bitsandbytes") is not None:
+            return True
+        print(
+            f"[WARNING] bitsandbytes is not installed; falling back to {fallback}"
+        )
+        return False
+
+    @staticmethod
+    def _compile_mode(model: Any) -> str:
+        """Pick the torch.compile mode for a loaded model.
+
+        Args:
+            model: The loaded model.
+
+        Returns:
+            "reduce-overhead" (CUDA graphs) for unquantized GPU weights,
+            "default" on CPU and for bitsandbytes-quantized weights, whose
+            kernels do not capture into CUDA graphs.
+        """
+        quantized = getattr(model, "is_loaded_in_8bit", False) or getattr(
+            model, "is_loaded_in_4bit", False
+        )
+        if settings.DEVICE == "cpu" or quantized:
+            return "default"
+        return "reduce-overhead"
+
+    @staticmethod
+    def _gpu_device_map(torch: Any) -> str:
+        """Pick the device map for GPU weights.
+
+        Args:
+            torch: The imported torch module.
+
+        Returns:
+            "balanced_low_0" across several GPUs (weights spread evenly,
+            leaving GPU 0 headroom for generation tensors), "cuda:0" on a
+            single GPU, or "auto" when CUDA is unavailable.
+        """
+        device_count = (
+            torch.cuda.device_count() if torch.cuda.is_available() else 0
+        )
+        if device_count > 1:
+            return "balanced_low_0"
+        if device_count == 1:
+            return "cuda:0"
+        return "auto"
+
+    @staticmethod
+    def _gpu_attn_implementation(torch: Any, dtype: Any) -> str:
+        """Pick the attention kernel for GPU weights.
+
+        Args:
+            torch: The imported torch module.
+            dtype: dtype the weights are loaded in.
+
+        Returns:
+            "flash_attention_2" when flash-attn is installed and weights
+            are half precision (a FlashAttention-2 requirement), else
+            "sdpa".
+        """
+        if dtype not in (torch.bfloat16, torch.float16):
+            return "sdpa"
+        if importlib.util.find_spec("flash_attn") is None:
+            return "sdpa"
+        return "flash_attention_2"
+
+    @staticmethod
+    def _gpu_dtype(torch: Any) -> Any:
+        """Pick the half-precision dtype for GPU weights.
+
+        Args:
+            torch: The imported torch module.
+
+        Returns:
+            torch.bfloat16 when supported, torch.float16 on older CUDA
+            devices, or "auto" when CUDA is unavailable.
+        """
+        if not torch.cuda.is_available():
+            return "auto"
+        if torch.cuda.is_bf16_supported():
+            return torch.bfloat16
+        return torch.float16
+
+
+@lru_cache(maxsize=4)
+def _load_tokenizer_cached(model_id: str) -> Any:
+    """Load a tokenizer once per model ID."""
+    return ModelManager(model_id)._load_tokenizer()
+
+
+@lru_cache(maxsize=4)
+def _load_model_cached(model_id: str, *load_settings: Any) -> tuple[Any, Any]:
+    """Load (tokenizer, model) once per model ID and load settings."""
+    return ModelManager(model_id)._load_model()
@@ -4,6 +4,9 @@ Builds structured prompts compatible with LLaMA/Gemma/Mistral instruction-tuned
 using Hugging Face chat templates, incorporating retrieved documents and system instructions.
 """
 
+import io
+from collections.abc import Iterable
+from functools import lru_cache
 from typing import Any
 
 from core.utils.imports import import_langchain_document_class
@@ -24,6 +27,37 @@ Guidelines:
 - Cite publication IDs when drawing on particular sources (e.g., “(Publication 12)”).
 - Avoid speculation or repetition. Respond with a clear, concise, and factual summary."""
 
+    # Fixed messages opening every prompt: system prompt plus a few-shot
+    # safe behavior instruction. Built once; never mutated.
+    _PREAMBLE_MESSAGES: tuple[dict[str, str], ...] = (
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                "Remember: if information is absent from the provided context, "
+                "state clearly that it is unavailable. Always cite publication IDs when using sources."
+            ),
+        },
+        {
+            "role": "assistant",
+            "content": (
+                "Understood. I will base answers strictly on the provided context, "
+                "cite publication IDs when relevant, and indicate when data is missing."
+            ),
+        },
+    )
+
+    _USER_TEMPLATE = (
+        "{query}\n\n"
+        "Context documents:\n{context_block}\n\n"
+        "Respond with a single, well-structured answer. "
+        "Do not restate or list the context verbatim; focus on reasoned synthesis."
+    )
+
+    # Stands in for the query in the cached no-context prompt (NUL bytes
+    # keep it from colliding with template or message text)
+    _QUERY_PLACEHOLDER = "\x00QUERY\x00"
+
     @staticmethod
     def _format_context_block(context_docs: list[Document]) -> str:
         """Format context documents as numbered sources with excerpts.
@@ -37,29 +71,32 @@ Guidelines:
         if not context_docs:
             return "No relevant documents found."
 
-        context_lines: list[str] = []
+        # Written into one buffer instead of joining per-document strings
+        buffer = io.StringIO()
         for idx, doc in enumerate(context_docs, start=1):
+            if idx > 1:
+                buffer.write("\n")
+
             # Extract publication_id from metadata
             publication_id = doc.metadata.get(
                 "publication_id", doc.metadata.get("doc_id", f"doc_{idx}")
             )
 
             # Get first ~800 characters as excerpt
-            excerpt = doc.page_content[:800].strip()
-            if len(doc.page_content) > 800:
-                excerpt += "..."
-
-            context_lines.append(
-                f"{idx}. [Publication ID: {publication_id}]\n{excerpt}\n"
-            )
+            content = doc.page_content
+            buffer.write(f"{idx}. [Publication ID: {publication_id}]\n")
+            buffer.write(content[:800].strip())
+            if len(content) > 800:
+                buffer.write("...")
+            buffer.write("\n")
 
-        return "\n".join(context_lines)
+        return buffer.getvalue()
 
     @staticmethod
     def build_rag_prompt(
         query: str,
         context_docs: list[Document],
-        chat_history: list[dict[str, str]] | None = None,
+        chat_history: Iterable[dict[str, str]] | None = None,
         tokenizer: Any = None,
     ) -> str:
         """Build RAG prompt with context and chat history using Hugging Face chat template.
@@ -67,8 +104,9 @@ Guidelines:
         Args:
             query: User's query.
             context_docs: List of retrieved context documents.
-            chat_history: Optional list of previous conversation messages as dicts
-                with "role" and "content" keys (e.g., [{"role": "user", "content": "..."}]).
+            chat_history: Optional previous conversation messages as dicts with
+                "role" and "content" keys (e.g., [{"role": "user", "content": "..."}]).
+                Any iterable is accepted; it is consumed once.
             tokenizer: Hugging Face tokenizer with chat template
 
         Returns:
@@ -82,41 +120,107 @@ Guidelines:
                 "Tokenizer with chat template is required for Gemma-style models."
             )
 
+        # No retrieval hits and no history: only the query varies, so fill
+        # it into a prompt rendered once per tokenizer
+        stripped_query = query.strip()
+        if not context_docs and not chat_history and stripped_query:
+            template = PromptManager._render_empty_context_template(tokenizer)
+            if template is not None:
+                return template.replace(
+                    PromptManager._QUERY_PLACEHOLDER, stripped_query, 1
+                )
+
         # Format context block
         context_block = PromptManager._format_context_block(context_docs)
 
-        # Few-shot safe behavior instruction
+        # Materialize history as a hashable key for the render cache
+        history: tuple[tuple[str, str], ...] = ()
+        if chat_history:
+            history = tuple(
+                (message["role"], message["content"])
+                for message in chat_history
+            )
+
+        return PromptManager._render_prompt(
+            query, context_block, history, tokenizer
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def render_preamble(tokenizer: Any) -> str:
+        """Render the fixed messages that open every prompt.
+
+        Args:
+            tokenizer: Hugging Face tokenizer with chat template.
+
+        Returns:
+            Chat-template text of _PREAMBLE_MESSAGES; with the usual
+            templates this is a prefix of every build_rag_prompt output.
+        """
+        return tokenizer.apply_chat_template(
+            list(PromptManager._PREAMBLE_MESSAGES), tokenize=False
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _render_empty_context_template(tokenizer: Any) -> str | None:
+        """Render the no-context prompt with a placeholder for the query.
+
+        Args:
+            tokenizer: Hugging Face tokenizer with chat template.
+
+        Returns:
+            Prompt text containing _QUERY_PLACEHOLDER exactly once, or None
+            if the chat template does not pass it through unchanged.
+        """
+        template = PromptManager._render_prompt.__wrapped__(
+            PromptManager._QUERY_PLACEHOLDER,
+            PromptManager._format_context_block([]),
+            (),
+            tokenizer,
+        )
+        if template.count(PromptManager._QUERY_PLACEHOLDER) != 1:
+            return None
+        return template
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _render_prompt(
+        query: str,
+        context_block: str,
+        chat_history: tuple[tuple[str, str], ...],
+        tokenizer: Any,
+    ) -> str:
+        """Render the chat template for a formatted context block.
+
+        Cached on all arguments, so repeated questions over the same
+        retrieved excerpts skip chat template rendering.
+
+        Args:
+            query: User's query.
+            context_block: Output of _format_context_block.
+            chat_history: Previous messages as (role, content) pairs.
+            tokenizer: Hugging Face tokenizer with chat template.
+
+        Returns:
+            Complete prompt string ready for model input.
+        """
         messages: list[dict[str, str]] = [
-            {"role": "system", "content": PromptManager.SYSTEM_PROMPT},
+            *PromptManager._PREAMBLE_MESSAGES,
+            # Add chat history if provided
+            *(
+                {"role": role, "content": content}
+                for role, content in chat_history
+            ),
+            # User content with query and context
             {
                 "role": "user",
-                "content": (
-                    "Remember: if information is absent from the provided context, "
-                    "state clearly that it is unavailable. Always cite publication IDs when using sources."
-                ),
-            },
-            {
-                "role": "assistant",
-                "content": (
-                    "Understood. I will base answers strictly on the provided context, "
-                    "cite publication IDs when relevant, and indicate when data is missing."
+                "content": PromptManager._USER_TEMPLATE.format(
+                    query=query.strip(), context_block=context_block
                 ),
             },
         ]
 
-        # Add chat history if provided
-        if chat_history:
-            messages.extend(chat_history)
-
-        # Build user content with query and context
-        user_content = (
-            f"{query.strip()}\n\n"
-            f"Context documents:\n{context_block}\n\n"
-            "Respond with a single, well-structured answer. "
-            "Do not restate or list the context verbatim; focus on reasoned synthesis."
-        )
-        messages.append({"role": "user", "content": user_content})
-
         # Apply chat template to generate final prompt
         prompt_text = tokenizer.apply_chat_template(
             messages, tokenize=False, add_generation_prompt=True
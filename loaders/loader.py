@@ -5,33 +5,52 @@ and produces LangChain Document objects for vector store indexing.
 """
 
 import logging
+import mmap
 import os
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from core.utils.concurrency import map_bounded
 from core.utils.imports import import_langchain_document_class
 from loaders.metadata import MetadataExtractor
 
 Document = import_langchain_document_class()
 logger = logging.getLogger(__name__)
 
+# Files at least this large are decoded straight from a memory map
+MMAP_MIN_SIZE = 1 << 20
+
 
 class DocumentLoader:
     """Loader for text documents with metadata extraction."""
 
-    def __init__(self, data_folder: str):
+    def __init__(self, data_folder: str, max_workers: int | None = None):
         """Initialize document loader.
 
         Args:
             data_folder: Path to folder containing .txt files.
+            max_workers: Threads reading files concurrently (None uses the
+                ThreadPoolExecutor default of min(32, CPU count + 4)).
         """
         self.data_folder = data_folder
+        self.max_workers = max_workers
         self.extractor = MetadataExtractor()
 
-    def _load_txt_file(self, file_path: str) -> str:
+    def _load_txt_file(
+        self, file_path: str, file_size: int | None = None
+    ) -> str:
         """Load text from a plain text file.
 
+        The file is read as bytes and decoded in one call, which skips the
+        chunked decoding of a text-mode read. Files of at least
+        MMAP_MIN_SIZE bytes are decoded directly from a read-only memory
+        map, so no intermediate bytes copy of the whole file is held next
+        to the decoded string. Newlines are translated as in text mode.
+
         Args:
             file_path: Path to the text file.
+            file_size: File size in bytes, if already known.
 
         Returns:
             File contents as string.
@@ -40,28 +59,25 @@ class DocumentLoader:
             FileNotFoundError: If file does not exist.
             UnicodeDecodeError: If file cannot be decoded as UTF-8.
         """
-        with open(file_path, encoding="utf-8") as f:
-            return f.read()
-
-    def _is_empty_file(self, file_path: str) -> bool:
-        """Check if file is empty.
-
-        Args:
-            file_path: Path to file.
-
-        Returns:
-            True if file is empty, False otherwise.
-        """
-        try:
-            return os.path.getsize(file_path) == 0
-        except OSError:
-            return True
-
-    def _find_txt_files(self) -> list[str]:
+        with open(file_path, "rb") as f:
+            if file_size is not None and file_size >= MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    text = str(mm, "utf-8")
+            else:
+                text = str(f.read(), "utf-8")
+
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def _find_txt_files(self) -> list[tuple[str, int]]:
         """Find all .txt files in data folder.
 
+        Sizes come from the directory scan, so no separate stat call is
+        needed per file.
+
         Returns:
-            List of file paths.
+            Sorted list of (file path, size in bytes) tuples.
         """
         txt_files = []
         data_path = Path(self.data_folder)
@@ -76,8 +92,10 @@ class DocumentLoader:
             )
             return txt_files
 
-        for file_path in data_path.glob("*.txt"):
-            txt_files.append(str(file_path))
+        with os.scandir(data_path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".txt") and entry.is_file():
+                    txt_files.append((entry.path, entry.stat().st_size))
 
         return sorted(txt_files)
 
@@ -93,59 +111,98 @@ class DocumentLoader:
         Note:
             Errors are logged and processing continues for remaining files.
         """
-        documents = []
+        return list(self.iter_documents())
+
+    def iter_documents(self) -> Iterator[Document]:
+        """Yield .txt documents with metadata one at a time.
+
+        Same documents and order as load_all_documents, but only a few
+        files per worker thread are read ahead of the consumer, so memory
+        stays bounded for large corpora.
+
+        Yields:
+            Document objects with metadata.
+
+        Note:
+            Errors are logged and processing continues for remaining files.
+        """
         txt_files = self._find_txt_files()
 
         if not txt_files:
             logger.info(f"No .txt files found in {self.data_folder}")
-            return documents
+            return
 
         logger.info(f"Found {len(txt_files)} .txt file(s) to process")
 
-        for file_path in txt_files:
-            try:
-                # Skip empty files
-                if self._is_empty_file(file_path):
-                    logger.debug(f"Skipping empty file: {file_path}")
-                    continue
-
-                # Load text content
-                text = self._load_txt_file(file_path)
-
-                # Skip if content is empty after loading
-                if not text.strip():
-                    logger.debug(
-                        f"Skipping file with empty content: {file_path}"
-                    )
-                    continue
-
-                # Extract publication metadata
-                filename = Path(file_path).name
-                metadata = self.extractor.extract_publication_metadata(
-                    text=text, filename=filename, file_path=file_path
-                )
-
-                # Create Document
-                doc = Document(page_content=text, metadata=metadata)
-                documents.append(doc)
-
-                logger.debug(
-                    f"Loaded document: {filename} "
-                    f"(words: {metadata['word_count']}, "
-                    f"topics: {metadata['topics']})"
-                )
-
-            except FileNotFoundError:
-                logger.error(f"File not found: {file_path}", exc_info=True)
-            except UnicodeDecodeError as e:
-                logger.error(
-                    f"Failed to decode file as UTF-8: {file_path} - {e}",
-                    exc_info=True,
-                )
-            except Exception as e:
-                logger.error(
-                    f"Error processing file {file_path}: {e}", exc_info=True
-                )
-
-        logger.info(f"Successfully loaded {len(documents)} document(s)")
-        return documents
+        # Overlap file reads across threads, in sorted file order
+        file_paths, file_sizes = zip(*txt_files, strict=True)
+        max_workers = self.max_workers or min(32, (os.cpu_count() or 1) + 4)
+        loaded = 0
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="document-loader"
+        ) as executor:
+            for doc in map_bounded(
+                executor,
+                self._process_file,
+                file_paths,
+                file_sizes,
+                max_pending=2 * max_workers,
+            ):
+                if doc is not None:
+                    loaded += 1
+                    yield doc
+
+        logger.info(f"Successfully loaded {loaded} document(s)")
+
+    def _process_file(self, file_path: str, file_size: int) -> Document | None:
+        """Load one .txt file and attach its publication metadata.
+
+        Args:
+            file_path: Path to the text file.
+            file_size: File size in bytes from the directory scan.
+
+        Returns:
+            Document, or None if the file is empty or could not be loaded.
+        """
+        try:
+            # Skip empty files
+            if file_size == 0:
+                logger.debug(f"Skipping empty file: {file_path}")
+                return None
+
+            # Load text content
+            text = self._load_txt_file(file_path, file_size)
+
+            # Skip if content is empty after loading
+            if not text.strip():
+                logger.debug(f"Skipping file with empty content: {file_path}")
+                return None
+
+            # Extract publication metadata
+            filename = Path(file_path).name
+            metadata = self.extractor.extract_publication_metadata(
+                text=text, filename=filename, file_path=file_path
+            )
+
+            # Create Document
+            doc = Document(page_content=text, metadata=metadata)
+
+            logger.debug(
+                f"Loaded document: {filename} "
+                f"(words: {metadata['word_count']}, "
+                f"topics: {metadata['topics']})"
+            )
+            return doc
+
+        except FileNotFoundError:
+            logger.error(f"File not found: {file_path}", exc_info=True)
+        except UnicodeDecodeError as e:
+            logger.error(
+                f"Failed to decode file as UTF-8: {file_path} - {e}",
+                exc_info=True,
+            )
+        except Exception as e:
+            logger.error(
+                f"Error processing file {file_path}: {e}", exc_info=True
+            )
+        return None
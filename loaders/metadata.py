@@ -80,8 +80,28 @@ class MetadataExtractor:
         ],
     }
 
-    # Date regex patterns: DD.MM.YYYY or YYYY-MM-DD
-    DATE_PATTERN = re.compile(r"\b(\d{2}\.\d{2}\.\d{4}|\d{4}-\d{2}-\d{2})\b")
+    # Lowercased, de-duplicated keywords per topic, prepared once
+    _TOPIC_KEYWORDS_LOWER = {
+        topic: tuple(dict.fromkeys(keyword.lower() for keyword in keywords))
+        for topic, keywords in TOPIC_KEYWORDS.items()
+    }
+
+    # Adjacent whitespace-separated words made only of letters once
+    # surrounding punctuation is stripped, neither starting with a-z. The
+    # second word sits in a lookahead so that it can also start the next
+    # pair.
+    _PUNCT = r"[.,;:!?\"'()\[\]{}]*"
+    _WORD = r"([^\W\d_a-z][^\W\d_]*)"
+    _WORD_PAIR_PATTERN = re.compile(
+        rf"(?<!\S){_PUNCT}{_WORD}{_PUNCT}\s+(?={_PUNCT}{_WORD}{_PUNCT}(?!\S))"
+    )
+
+    # Date regex patterns: DD.MM.YYYY or YYYY-MM-DD. Both share a leading
+    # two-digit prefix, and the (?=\d) guard rejects non-digit offsets
+    # before the word-boundary check.
+    DATE_PATTERN = re.compile(
+        r"(?=\d)\b(\d{2}(?:\.\d{2}\.\d{4}|\d{2}-\d{2}-\d{2}))\b"
+    )
 
     @staticmethod
     def _count_words(text: str) -> int:
@@ -120,8 +140,8 @@ class MetadataExtractor:
         text_lower = text.lower()
         matched_topics = []
 
-        for topic, keywords in MetadataExtractor.TOPIC_KEYWORDS.items():
-            if any(keyword.lower() in text_lower for keyword in keywords):
+        for topic, keywords in MetadataExtractor._TOPIC_KEYWORDS_LOWER.items():
+            if any(keyword in text_lower for keyword in keywords):
                 matched_topics.append(topic)
 
         return matched_topics
@@ -137,22 +157,17 @@ class MetadataExtractor:
         Returns:
             List of potential company names.
         """
-        # Split into words
-        words = text.split()
-
-        # Find potential company names: consecutive capitalized words (bigrams)
         companies = []
         seen = set()
 
-        for i in range(len(words) - 1):
-            word1 = words[i].strip(".,;:!?\"'()[]{}")
-            word2 = words[i + 1].strip(".,;:!?\"'()[]{}")
+        # Candidate bigrams come from one regex scan; only the case checks
+        # run in Python
+        for match in MetadataExtractor._WORD_PAIR_PATTERN.finditer(text):
+            word1, word2 = match.groups()
 
             # Check if both words start with capital letter and are not all caps
             if (
-                word1
-                and word2
-                and word1[0].isupper()
+                word1[0].isupper()
                 and word2[0].isupper()
                 and not word1.isupper()
                 and not word2.isupper()
@@ -215,19 +230,31 @@ class MetadataExtractor:
         return metadata
 
 
-def extract_metadata(file_path: str, content: str) -> DocumentMetadata:
+def extract_metadata(
+    file_path: str, content: str | None = None
+) -> DocumentMetadata:
     """Extract metadata from a file and its content.
 
     Args:
         file_path: Path to the file.
-        content: Text content of the file.
+        content: Text content of the file. If omitted, the hash is computed
+            from the file's bytes in chunks, without encoding a copy of the
+            text.
 
     Returns:
         DocumentMetadata object.
     """
     path = Path(file_path)
     file_size = os.path.getsize(file_path)
-    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    if content is None:
+        hasher = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+        content_hash = hasher.hexdigest()
+    else:
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
 
     return DocumentMetadata(
         source=str(path.absolute()),
@@ -2,14 +2,20 @@
 Monitoring and observability package.
 
 Provides comprehensive observability tools for the application:
-- Structured logging (StructuredLogger, setup_logging)
-- Performance metrics collection (MetricsCollector, get_metrics, measure_latency)
+- Structured logging (StructuredLogger, setup_logging, request context)
+- Performance metrics collection (MetricsCollector, TimerStats, get_metrics, measure_latency)
 - Distributed tracing support (setup_tracing, get_tracer)
 """
 
-from .logging import StructuredLogger, setup_logging
+from .logging import (
+    StructuredLogger,
+    bind_request_context,
+    reset_request_context,
+    setup_logging,
+)
 from .metrics import (
     MetricsCollector,
+    TimerStats,
     get_metrics,
     get_metrics_registry,
     measure_latency,
@@ -19,7 +25,10 @@ from .tracing import get_tracer, setup_tracing
 __all__ = [
     "StructuredLogger",
     "setup_logging",
+    "bind_request_context",
+    "reset_request_context",
     "MetricsCollector",
+    "TimerStats",
     "get_metrics",
     "get_metrics_registry",
     "measure_latency",
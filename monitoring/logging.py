@@ -4,19 +4,280 @@ Captures RAG pipeline events with document metadata and performance
 metrics, supporting both console and file-based output.
 """
 
-import json
+import atexit
 import logging
+import os
+import queue
+import stat
 import sys
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+import traceback
+from contextvars import ContextVar, Token
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from typing import Any
 
+import orjson
+
 from config import settings
 from core.utils.imports import import_langchain_document_class
 
 Document = import_langchain_document_class()
 
+# Request-scoped identifiers, bound per request by the API middleware
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+trace_id_var: ContextVar[str | None] = ContextVar("trace_id", default=None)
+
+# Standard LogRecord attributes, excluded from the extra fields
+_STANDARD_ATTRS = frozenset(
+    {
+        "name",
+        "msg",
+        "args",
+        "created",
+        "filename",
+        "funcName",
+        "levelname",
+        "levelno",
+        "lineno",
+        "module",
+        "msecs",
+        "message",
+        "pathname",
+        "process",
+        "processName",
+        "relativeCreated",
+        "thread",
+        "threadName",
+        "exc_info",
+        "exc_text",
+        "stack_info",
+    }
+)
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """Rotating file handler that coalesces writes into large buffers.
+
+    The stock handler flushes after every record and, to decide on
+    rollover, stats the file, seeks (another flush) and formats each
+    record twice. Here records go into a large write buffer, the file
+    size is tracked in memory, and a background thread flushes on an
+    interval. Rollover and close flush as well.
+    """
+
+    def __init__(
+        self,
+        filename: str | os.PathLike,
+        *args: Any,
+        buffer_size: int = 64 * 1024,
+        flush_interval: float = 0.5,
+        **kwargs: Any,
+    ):
+        """Initialize the handler.
+
+        Args:
+            filename: Log file path.
+            *args: Positional arguments for RotatingFileHandler.
+            buffer_size: Write buffer size in bytes.
+            flush_interval: Seconds between background flushes.
+            **kwargs: Keyword arguments for RotatingFileHandler.
+        """
+        self.buffer_size = buffer_size
+        self._position = 0
+        self._regular_file = True
+        self._stream_encoding = "utf-8"
+        super().__init__(filename, *args, **kwargs)
+
+        self._stop_flushing = threading.Event()
+        threading.Thread(
+            target=self._flush_periodically,
+            args=(flush_interval,),
+            name="log-flush",
+            daemon=True,
+        ).start()
+
+    def _open(self) -> Any:
+        """Open the log file with a large write buffer."""
+        stream = open(
+            self.baseFilename,
+            self.mode,
+            buffering=self.buffer_size,
+            encoding=self.encoding,
+            errors=self.errors,
+        )
+        file_stat = os.fstat(stream.fileno())
+        self._position = file_stat.st_size
+        # Resolved codec name (self.encoding may be None or "locale")
+        self._stream_encoding = stream.encoding
+        # See bpo-45401: never roll over anything but regular files
+        self._regular_file = stat.S_ISREG(file_stat.st_mode)
+        return stream
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Format the record once, roll over if needed and buffer it."""
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            # maxBytes counts bytes; non-ASCII text (e.g. German) is longer
+            # encoded than in characters
+            if msg.isascii():
+                size = len(msg)
+            else:
+                size = len(
+                    msg.encode(self._stream_encoding, self.errors or "strict")
+                )
+            if (
+                self.maxBytes > 0
+                and self._regular_file
+                and self._position + size >= self.maxBytes
+            ):
+                self.doRollover()
+            self.stream.write(msg)
+            self._position += size
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Skip per-record flushes; the buffer is flushed periodically."""
+
+    def close(self) -> None:
+        """Stop the flush thread and close (flushing) the file."""
+        self._stop_flushing.set()
+        super().close()
+
+    def _flush_periodically(self, interval: float) -> None:
+        """Flush the write buffer every interval seconds until closed."""
+        while not self._stop_flushing.wait(interval):
+            super().flush()
+
+
+# Background listeners doing handler I/O, per logger name
+_queue_listeners: dict[str, QueueListener] = {}
+
+
+class _RecordQueueHandler(QueueHandler):
+    """Queue handler that hands records to the listener mostly as-is.
+
+    The stock prepare() pre-formats the message (folding in tracebacks)
+    for pickling; records here stay in-process, so the real handlers
+    format them and only the message arguments are merged eagerly.
+    The request identifiers are copied onto the record, since the
+    listener thread does not see the caller's ContextVars.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        request_id = request_id_var.get()
+        if request_id is not None:
+            record.request_id = request_id
+        trace_id = trace_id_var.get()
+        if trace_id is not None:
+            record.trace_id = trace_id
+        return record
+
+
+def _attach_queued_handlers(
+    logger: logging.Logger, *handlers: logging.Handler
+) -> None:
+    """Route a logger's records to handlers on a background thread.
+
+    The calling thread only enqueues each record; a QueueListener does
+    formatting and I/O. A listener from an earlier call for the same
+    logger is stopped and its handlers closed.
+
+    Args:
+        logger: Logger to attach the queue handler to.
+        *handlers: Handlers run by the listener.
+    """
+    previous = _queue_listeners.pop(logger.name, None)
+    if previous is not None:
+        previous.stop()
+        for handler in previous.handlers:
+            handler.close()
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    logger.addHandler(_RecordQueueHandler(log_queue))
+    listener.start()
+    _queue_listeners[logger.name] = listener
+
+
+@atexit.register
+def _stop_queue_listeners() -> None:
+    """Drain queued records before the interpreter exits."""
+    while _queue_listeners:
+        _, listener = _queue_listeners.popitem()
+        listener.stop()
+
+
+def _console_enabled() -> bool:
+    """Whether to add a stdout handler next to the log files.
+
+    Without a terminal (CI, ingest jobs, containers whose log file is
+    already collected) every record would be formatted and written twice.
+    """
+    if settings.LOG_CONSOLE is not None:
+        return settings.LOG_CONSOLE
+    return sys.stdout.isatty()
+
+
+@lru_cache(maxsize=4)
+def _utc_second(seconds: int) -> str:
+    """Format a whole epoch second as an ISO 8601 UTC date and time.
+
+    Records logged within the same second share one strftime call.
+    """
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+
+
+def _format_timestamp(created: float) -> str:
+    """Format an epoch timestamp as ISO 8601 UTC with microseconds.
+
+    Args:
+        created: Seconds since the epoch (LogRecord.created).
+
+    Returns:
+        Timestamp such as "2024-01-31T12:00:00.123456Z".
+    """
+    seconds = int(created)
+    micros = round((created - seconds) * 1_000_000)
+    if micros == 1_000_000:
+        seconds, micros = seconds + 1, 0
+    return f"{_utc_second(seconds)}.{micros:06d}Z"
+
+
+def bind_request_context(
+    request_id: str, trace_id: str | None = None
+) -> tuple[Token, Token]:
+    """Bind request identifiers to the current context.
+
+    Args:
+        request_id: Request identifier.
+        trace_id: Optional distributed trace identifier.
+
+    Returns:
+        Tokens to pass to reset_request_context.
+    """
+    return request_id_var.set(request_id), trace_id_var.set(trace_id)
+
+
+def reset_request_context(tokens: tuple[Token, Token]) -> None:
+    """Restore the request identifiers bound before bind_request_context.
+
+    Args:
+        tokens: Tokens returned by bind_request_context.
+    """
+    request_token, trace_token = tokens
+    request_id_var.reset(request_token)
+    trace_id_var.reset(trace_token)
+
 
 class JSONFormatter(logging.Formatter):
     """JSON formatter for structured logging."""
@@ -31,7 +292,7 @@ class JSONFormatter(logging.Formatter):
             JSON string representation of log record.
         """
         log_data = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": _format_timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -40,37 +301,22 @@ class JSONFormatter(logging.Formatter):
             "line": record.lineno,
         }
 
+        # Queued records carry request_id/trace_id as attributes (see
+        # _RecordQueueHandler.prepare), added with the extra fields below
+        request_id = request_id_var.get()
+        if request_id is not None:
+            log_data["request_id"] = request_id
+        trace_id = trace_id_var.get()
+        if trace_id is not None:
+            log_data["trace_id"] = trace_id
+
         # Add extra fields from record (passed via extra parameter)
         # Exclude standard LogRecord attributes
-        standard_attrs = {
-            "name",
-            "msg",
-            "args",
-            "created",
-            "filename",
-            "funcName",
-            "levelname",
-            "levelno",
-            "lineno",
-            "module",
-            "msecs",
-            "message",
-            "pathname",
-            "process",
-            "processName",
-            "relativeCreated",
-            "thread",
-            "threadName",
-            "exc_info",
-            "exc_text",
-            "stack_info",
-        }
-
         for key, value in record.__dict__.items():
-            if key not in standard_attrs and not key.startswith("_"):
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
                 log_data[key] = value
 
-        return json.dumps(log_data)
+        return orjson.dumps(log_data, default=str).decode()
 
 
 class StructuredLogger:
@@ -98,19 +344,23 @@ class StructuredLogger:
 
         # JSON file handler
         json_file = self.log_dir / f"{name}.jsonl"
-        file_handler = RotatingFileHandler(
+        file_handler = BufferedRotatingFileHandler(
             json_file, maxBytes=10 * 1024 * 1024, backupCount=5
         )
         file_handler.setFormatter(JSONFormatter())
-        self.logger.addHandler(file_handler)
+        handlers: list[logging.Handler] = [file_handler]
 
         # Console handler (human-readable)
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
+        if _console_enabled():
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_formatter = logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+            )
+            console_handler.setFormatter(console_formatter)
+            handlers.append(console_handler)
+
+        # File and console I/O happen on a background thread
+        _attach_queued_handlers(self.logger, *handlers)
 
     def log_query(
         self,
@@ -145,37 +395,50 @@ class StructuredLogger:
         if user_id:
             log_data["user_id"] = user_id
 
-        # Extract document IDs
+        # Extract document IDs (doc_id only looked up as a fallback)
         doc_ids = []
         for doc in retrieved_docs:
-            doc_id = doc.metadata.get(
-                "publication_id", doc.metadata.get("doc_id", "unknown")
+            metadata = doc.metadata
+            doc_ids.append(
+                metadata["publication_id"]
+                if "publication_id" in metadata
+                else metadata.get("doc_id", "unknown")
             )
-            doc_ids.append(doc_id)
 
         log_data["document_ids"] = doc_ids
 
         self.logger.info("Query processed", extra=log_data)
 
     def log_error(
-        self, error: Exception, context: dict[str, Any] | None = None
+        self,
+        error: Exception,
+        context: dict[str, Any] | None = None,
+        full_traceback: bool = False,
     ) -> None:
         """Log an error with context.
 
         Args:
             error: Exception that occurred.
             context: Optional context dictionary with additional information.
+            full_traceback: Log the full traceback rather than only the
+                exception line; walking and formatting the stack is costly
+                when errors are frequent.
         """
+        if full_traceback:
+            formatted = traceback.format_exception(error)
+        else:
+            formatted = traceback.format_exception_only(error)
         log_data = {
             "event_type": "error",
             "error_type": type(error).__name__,
             "error_message": str(error),
+            "traceback": "".join(formatted).rstrip(),
         }
 
         if context:
             log_data.update(context)
 
-        self.logger.error("Error occurred", extra=log_data, exc_info=True)
+        self.logger.error("Error occurred", extra=log_data)
 
 
 def setup_logging() -> logging.Logger:
@@ -193,19 +456,22 @@ def setup_logging() -> logging.Logger:
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
     logger.setLevel(log_level)
 
+    handlers: list[logging.Handler] = []
+
     # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(log_level)
-    console_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    if _console_enabled():
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(log_level)
+        console_formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
+        console_handler.setFormatter(console_formatter)
+        handlers.append(console_handler)
 
     # File handler (rotating)
     log_dir = Path(settings.LOG_DIR)
     log_dir.mkdir(exist_ok=True)
-    file_handler = RotatingFileHandler(
+    file_handler = BufferedRotatingFileHandler(
         log_dir / "app.log", maxBytes=10 * 1024 * 1024, backupCount=5
     )
     file_handler.setLevel(log_level)
@@ -213,6 +479,9 @@ def setup_logging() -> logging.Logger:
         "%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s"
     )
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
+    handlers.append(file_handler)
+
+    # File and console I/O happen on a background thread
+    _attach_queued_handlers(logger, *handlers)
 
     return logger
@@ -4,26 +4,100 @@ Provides in-memory registry for API endpoint exposure and supports
 decorator-based timing instrumentation across the application.
 """
 
+import math
+import threading
 import time
 from collections.abc import Callable
-from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from functools import wraps
 from typing import Any
 
-# In-memory registry for demo
-_metrics_registry: dict[str, Any] = {
-    "counters": {},
-    "timers": {},
-}
+
+@dataclass
+class TimerStats:
+    """Running aggregates of a timer, updated in O(1) per observation."""
+
+    count: int = 0
+    total: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    def observe(self, value: float) -> None:
+        """Fold one observation into the aggregates.
+
+        Args:
+            value: Observed duration.
+        """
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other: "TimerStats") -> None:
+        """Fold another timer's aggregates into this one.
+
+        Args:
+            other: Aggregates to add.
+        """
+        self.count += other.count
+        self.total += other.total
+        if other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if other.maximum > self.maximum:
+            self.maximum = other.maximum
+
+    @property
+    def mean(self) -> float:
+        """Mean of the observations (0.0 if none)."""
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        """Summarize as count, avg_ms, min_ms and max_ms (zeros if empty).
+
+        Returns:
+            Dictionary for the JSON metrics endpoint.
+        """
+        if not self.count:
+            return {"count": 0, "avg_ms": 0, "min_ms": 0, "max_ms": 0}
+        return {
+            "count": self.count,
+            "avg_ms": self.mean,
+            "min_ms": self.minimum,
+            "max_ms": self.maximum,
+        }
 
 
 class MetricsCollector:
-    """Simple metrics collector for tracking operations."""
+    """Simple metrics collector for tracking operations.
+
+    Each thread writes to its own shard of counters and timers, so the
+    recording path takes no lock and threads never contend on shared
+    dicts; reads merge the shards.
+    """
 
     def __init__(self):
         """Initialize metrics collector."""
-        self.counts: dict[str, int] = {}
-        self.timings: dict[str, list[float]] = {}
+        self._local = threading.local()
+        # (counts, timings) per thread that recorded anything
+        self._shards: list[tuple[dict[str, int], dict[str, TimerStats]]] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> tuple[dict[str, int], dict[str, TimerStats]]:
+        """Get the calling thread's (counts, timings) shard.
+
+        Returns:
+            The shard, created and registered on the thread's first call.
+        """
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: tuple[dict[str, int], dict[str, TimerStats]] = ({}, {})
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
 
     def increment(self, metric_name: str, value: int = 1) -> None:
         """Increment a counter metric.
@@ -32,9 +106,8 @@ class MetricsCollector:
             metric_name: Name of the metric.
             value: Value to increment by.
         """
-        self.counts[metric_name] = self.counts.get(metric_name, 0) + value
-        # Update registry
-        _metrics_registry["counters"][metric_name] = self.counts[metric_name]
+        counts = self._shard()[0]
+        counts[metric_name] = counts.get(metric_name, 0) + value
 
     def record_timing(self, metric_name: str, duration: float) -> None:
         """Record a timing metric.
@@ -43,13 +116,37 @@ class MetricsCollector:
             metric_name: Name of the metric.
             duration: Duration in seconds.
         """
-        if metric_name not in self.timings:
-            self.timings[metric_name] = []
-        self.timings[metric_name].append(duration)
-        # Update registry
-        if metric_name not in _metrics_registry["timers"]:
-            _metrics_registry["timers"][metric_name] = []
-        _metrics_registry["timers"][metric_name].append(duration)
+        timings = self._shard()[1]
+        stats = timings.get(metric_name)
+        if stats is None:
+            stats = timings[metric_name] = TimerStats()
+        stats.observe(duration)
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """Counter values summed over all threads."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        counts: dict[str, int] = {}
+        for shard_counts, _ in shards:
+            for name, value in shard_counts.copy().items():
+                counts[name] = counts.get(name, 0) + value
+        return counts
+
+    @property
+    def timings(self) -> dict[str, TimerStats]:
+        """Timer aggregates merged over all threads (copies)."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        timings: dict[str, TimerStats] = {}
+        for _, shard_timings in shards:
+            for name, stats in shard_timings.copy().items():
+                merged = timings.get(name)
+                if merged is None:
+                    timings[name] = replace(stats)
+                else:
+                    merged.merge(stats)
+        return timings
 
     def get_count(self, metric_name: str) -> int:
         """Get count for a metric.
@@ -71,17 +168,26 @@ class MetricsCollector:
         Returns:
             Average duration in seconds, or None if no data.
         """
-        timings = self.timings.get(metric_name)
-        if not timings:
+        stats = self.timings.get(metric_name)
+        if stats is None or not stats.count:
             return None
-        return sum(timings) / len(timings)
+        return stats.mean
 
     def reset(self) -> None:
         """Reset all metrics."""
-        self.counts.clear()
-        self.timings.clear()
-        _metrics_registry["counters"].clear()
-        _metrics_registry["timers"].clear()
+        with self._shards_lock:
+            for counts, timings in self._shards:
+                counts.clear()
+                timings.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Merge the per-thread shards into one view.
+
+        Returns:
+            Dictionary with 'counters' (name -> value) and 'timers'
+            (name -> TimerStats copy) keys.
+        """
+        return {"counters": self.counts, "timers": self.timings}
 
 
 # Global metrics instance
@@ -94,24 +200,25 @@ def get_metrics() -> MetricsCollector:
 
 
 def get_metrics_registry() -> dict[str, Any]:
-    """Get the in-memory metrics registry.
+    """Get a snapshot of the global collector's metrics.
 
     Returns:
-        Dictionary with 'counters' and 'timers' keys containing metric data.
+        Dictionary with 'counters' (name -> value) and 'timers'
+        (name -> TimerStats) keys.
     """
-    return _metrics_registry.copy()
+    return _metrics.snapshot()
 
 
-@contextmanager
-def measure_latency(name: str):
+class _LatencyTimer:
     """Context manager to measure latency in milliseconds.
 
-    Args:
-        name: Name of the metric.
+    A slotted class rather than a @contextmanager generator, so entering
+    and leaving the block allocates no generator or closure. The clock is
+    read as integer nanoseconds; milliseconds are derived once on exit.
 
-    Yields:
-        Elapsed time in milliseconds (as float). The value is available
-        after the context block completes.
+    The managed object is callable and returns the elapsed time in
+    milliseconds: the live value inside the block and the recorded value
+    once the block completes.
 
     Example:
         with measure_latency("query_processing") as elapsed_ms:
@@ -120,19 +227,35 @@ def measure_latency(name: str):
         # elapsed_ms() returns the elapsed time in milliseconds
         print(f"Took {elapsed_ms()} ms")
     """
-    start = time.perf_counter()
-    elapsed_ms: list[float] = [0.0]  # Use list for mutability in nested scope
 
-    def get_elapsed():
+    __slots__ = ("name", "start", "elapsed")
+
+    def __init__(self, name: str):
+        """Initialize the timer.
+
+        Args:
+            name: Name of the metric.
+        """
+        self.name = name
+        self.start = 0
+        self.elapsed: float | None = None
+
+    def __enter__(self) -> "_LatencyTimer":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.elapsed = (time.perf_counter_ns() - self.start) / 1_000_000
+        _metrics.record_timing(self.name, self.elapsed)
+
+    def __call__(self) -> float:
         """Get elapsed time in milliseconds."""
-        return (time.perf_counter() - start) * 1000.0
-
-    try:
-        yield get_elapsed
-    finally:
-        elapsed_seconds = time.perf_counter() - start
-        elapsed_ms[0] = elapsed_seconds * 1000.0
-        get_metrics().record_timing(name, elapsed_ms[0])
+        if self.elapsed is not None:
+            return self.elapsed
+        return (time.perf_counter_ns() - self.start) / 1_000_000
+
+
+measure_latency = _LatencyTimer
 
 
 def track_timing(metric_name: str):
@@ -8,7 +8,10 @@ from typing import Any
 
 from config import settings
 
-# Global tracer instance
+# Cached in place of a tracer when OpenTelemetry is not installed
+_NOOP = object()
+
+# Global tracer instance (None until resolved, _NOOP if unavailable)
 _tracer: Any | None = None
 _tracer_provider: Any | None = None
 
@@ -17,11 +20,11 @@ def setup_tracing() -> None:
     """Set up OpenTelemetry tracing if enabled.
 
     Initializes OpenTelemetry tracer for FastAPI/Streamlit hooks.
-    No-op if settings.ENABLE_TRACING is False.
+    No-op if settings.ENABLE_TRACING is False or tracing is already set up.
     """
     global _tracer, _tracer_provider
 
-    if not settings.ENABLE_TRACING:
+    if not settings.ENABLE_TRACING or _tracer_provider is not None:
         return
 
     try:
@@ -53,7 +56,7 @@ def setup_tracing() -> None:
 
     except ImportError:
         # OpenTelemetry not installed, tracing is no-op
-        _tracer = None
+        _tracer = _NOOP
         _tracer_provider = None
 
 
@@ -67,23 +70,26 @@ def get_tracer() -> Any | None:
     Note:
         Returns None if settings.ENABLE_TRACING is False or if
         OpenTelemetry is not installed. Call setup_tracing() first
-        to initialize tracing.
+        to initialize tracing. The tracer (or its absence) is resolved
+        once and cached.
     """
     global _tracer
 
     if not settings.ENABLE_TRACING:
         return None
 
-    if _tracer is None:
-        # Try to get tracer, or return None if not initialized
+    tracer = _tracer
+    if tracer is None:
+        # Resolve the tracer (or its absence) once
         try:
             from opentelemetry import trace
 
-            return trace.get_tracer(__name__)
+            tracer = trace.get_tracer(__name__)
         except ImportError:
-            return None
+            tracer = _NOOP
+        _tracer = tracer
 
-    return _tracer
+    return None if tracer is _NOOP else tracer
 
 
 # Initialize tracing on module import if enabled
@@ -4,14 +4,51 @@ Ingestion readiness check for deployment pipelines.
 Verifies ChromaDB vector store existence and non-empty status,
 exiting with appropriate status codes for CI/CD automation.
 """
+import sqlite3
 import sys
+from contextlib import closing
 from pathlib import Path
 
 from config import settings
-from core.embeddings import get_embeddings
-from core.utils.imports import import_langchain_chroma
 
-Chroma = import_langchain_chroma()
+# Rows of the collection's metadata segment, one per stored vector
+_COUNT_VECTORS_SQL = """
+SELECT count(*)
+FROM embeddings
+JOIN segments ON embeddings.segment_id = segments.id
+JOIN collections ON segments.collection = collections.id
+WHERE collections.name = ?
+"""
+
+
+def count_vectors(chroma_dir: Path) -> int | None:
+    """Count the collection's vectors straight from Chroma's SQLite file.
+
+    Opens the database read-only, without loading embeddings or a Chroma
+    client.
+
+    Args:
+        chroma_dir: ChromaDB persist directory.
+
+    Returns:
+        Number of vectors in settings.CHROMA_COLLECTION (0 if the database
+        or collection does not exist), or None if the schema is not the
+        expected one.
+    """
+    db_path = chroma_dir / "chroma.sqlite3"
+    if not db_path.is_file():
+        return 0
+
+    # as_uri() needs an absolute path (CHROMA_DIR defaults to ".chroma")
+    db_uri = f"{db_path.resolve().as_uri()}?mode=ro"
+    try:
+        with closing(sqlite3.connect(db_uri, uri=True)) as conn:
+            (count,) = conn.execute(
+                _COUNT_VECTORS_SQL, (settings.CHROMA_COLLECTION,)
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return count
 
 
 def needs_ingestion() -> bool:
@@ -26,11 +63,19 @@ def needs_ingestion() -> bool:
     if not chroma_dir.exists() or not any(chroma_dir.iterdir()):
         return True
 
-    # Check if ChromaDB has vectors
+    # Check if ChromaDB has vectors, via SQLite when the schema allows
+    count = count_vectors(chroma_dir)
+    if count is not None:
+        return count == 0
+
     try:
+        # Heavy imports (torch, sentence-transformers) only on this path
+        from core.embeddings import get_embeddings
+        from core.vectorstore import create_vectordb
+
         embeddings = get_embeddings()
-        vectordb = Chroma(
-            persist_directory=str(chroma_dir), embedding_function=embeddings
+        vectordb = create_vectordb(
+            embedding_function=embeddings, persist_directory=str(chroma_dir)
         )
 
         if (
@@ -6,11 +6,36 @@ and key settings for troubleshooting and setup verification.
 """
 import os
 import sys
+from collections.abc import Iterator
 from pathlib import Path
 
 from config import settings
 
 
+def _scan_files(
+    root: str | os.PathLike, recursive: bool = False
+) -> Iterator[os.DirEntry]:
+    """Yield the regular files in a directory in one readdir pass.
+
+    DirEntry caches its type from readdir and its stat result after the
+    first call, so each file costs at most one stat syscall.
+
+    Args:
+        root: Directory to scan.
+        recursive: Also descend into subdirectories.
+
+    Yields:
+        DirEntry for each regular file.
+    """
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    yield from _scan_files(entry.path, recursive=True)
+            elif entry.is_file():
+                yield entry
+
+
 def print_environment():
     """Print environment information."""
     print("=" * 60)
@@ -42,21 +67,26 @@ def print_data_count():
         print()
         return
 
-    # Count .txt files
-    txt_files = list(data_folder.glob("*.txt"))
-    total_size = sum(f.stat().st_size for f in txt_files if f.is_file())
+    # Count .txt files and other files in one pass
+    txt_count = 0
+    total_size = 0
+    other_count = 0
+    for entry in _scan_files(data_folder):
+        if entry.name.endswith(".txt"):
+            txt_count += 1
+            total_size += entry.stat().st_size
+        else:
+            other_count += 1
 
     print(f"✓ Data folder: {data_folder}")
-    print(f"  .txt files: {len(txt_files)}")
+    print(f"  .txt files: {txt_count}")
     print(
         f"  Total size: {total_size:,} bytes ({total_size / 1024 / 1024:.2f} MB)"
     )
 
     # Count other file types if present
-    all_files = list(data_folder.glob("*"))
-    other_files = [f for f in all_files if f.is_file() and f.suffix != ".txt"]
-    if other_files:
-        print(f"  Other files: {len(other_files)}")
+    if other_count:
+        print(f"  Other files: {other_count}")
 
     print()
 
@@ -71,27 +101,36 @@ def print_chroma_status():
 
     if chroma_dir.exists() and chroma_dir.is_dir():
         # Count files in ChromaDB directory
-        chroma_files = list(chroma_dir.rglob("*"))
-        chroma_files = [f for f in chroma_files if f.is_file()]
-        chroma_size = sum(f.stat().st_size for f in chroma_files if f.exists())
+        chroma_count = 0
+        chroma_size = 0
+        for entry in _scan_files(chroma_dir, recursive=True):
+            chroma_count += 1
+            chroma_size += entry.stat().st_size
 
         print(f"✓ ChromaDB directory exists: {chroma_dir}")
-        print(f"  Files: {len(chroma_files)}")
+        print(f"  Files: {chroma_count}")
         print(
             f"  Size: {chroma_size:,} bytes ({chroma_size / 1024 / 1024:.2f} MB)"
         )
 
         # Try to get collection count if ChromaDB is initialized
         try:
-            from core.embeddings import get_embeddings
-            from core.utils.imports import import_langchain_chroma
+            from scripts.check_needs_ingestion import count_vectors
 
-            Chroma = import_langchain_chroma()
+            # Read the count from SQLite; load Chroma only if that fails
+            count = count_vectors(chroma_dir)
+            if count is not None:
+                print(f"  Vector count: {count}")
+                print()
+                return
+
+            from core.embeddings import get_embeddings
+            from core.vectorstore import create_vectordb
 
             embeddings = get_embeddings()
-            vectordb = Chroma(
-                persist_directory=str(chroma_dir),
+            vectordb = create_vectordb(
                 embedding_function=embeddings,
+                persist_directory=str(chroma_dir),
             )
 
             # Try to get collection count
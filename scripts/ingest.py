@@ -5,24 +5,234 @@ Loads text files, applies chunking with metadata preservation,
 and indexes documents into ChromaDB for semantic search.
 """
 import argparse
+import itertools
 import os
 import sys
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any
 
-from langchain_community.vectorstores.utils import filter_complex_metadata
+import xxhash
 
 from config import settings
 from core.chunking import MetadataAwareChunker
 from core.embeddings import get_embeddings
-from core.utils.imports import import_langchain_chroma
+from core.utils.concurrency import map_bounded
+from core.vectorstore import create_vectordb, stamp_index_version
 from loaders.loader import DocumentLoader
 from monitoring.logging import setup_logging
 
-Chroma = import_langchain_chroma()
 logger = setup_logging()
 
+# Metadata value types ChromaDB accepts (as in filter_complex_metadata)
+_PRIM = (str, int, float, bool)
 
-def main():
-    """Main ingestion function."""
+# Document metadata passed to the chunker as dedicated arguments
+_RESERVED_METADATA_KEYS = frozenset({"source", "publication_id", "file_name"})
+
+
+@lru_cache(maxsize=1)
+def _get_chunker(chunk_size: int, chunk_overlap: int) -> MetadataAwareChunker:
+    """Build the chunker once per worker process."""
+    return MetadataAwareChunker(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+
+
+def _document_payload(doc: Any) -> tuple[str, str, str, dict[str, Any]]:
+    """Reduce a loaded document to what chunking needs.
+
+    Args:
+        doc: Loaded Document.
+
+    Returns:
+        Tuple of (text, source, doc_id, extra_metadata); cheaper to send
+        to a worker process than the Document itself.
+    """
+    # Extract source and doc_id from document metadata
+    source = doc.metadata.get("source", "Deutsche Telekom")
+    doc_id = doc.metadata.get(
+        "publication_id", doc.metadata.get("file_name", "unknown")
+    )
+
+    # Extract additional metadata to pass through
+    extra_metadata = {
+        k: v
+        for k, v in doc.metadata.items()
+        if k not in _RESERVED_METADATA_KEYS
+    }
+    return doc.page_content, source, doc_id, extra_metadata
+
+
+def _chunk_one(
+    payload: tuple[str, str, str, dict[str, Any]],
+    chunk_size: int,
+    chunk_overlap: int,
+) -> list[Any]:
+    """Chunk one document payload (runs in a worker process).
+
+    Args:
+        payload: Output of _document_payload.
+        chunk_size: Chunk size in characters.
+        chunk_overlap: Chunk overlap in characters.
+
+    Returns:
+        List of chunk Documents, with complex metadata values (lists,
+        dicts, etc.) that ChromaDB doesn't support removed.
+    """
+    text, source, doc_id, extra_metadata = payload
+    chunks = _get_chunker(chunk_size, chunk_overlap).chunk_with_metadata(
+        text=text, source=source, doc_id=doc_id, **extra_metadata
+    )
+    for chunk in chunks:
+        chunk.metadata = {
+            k: v for k, v in chunk.metadata.items() if isinstance(v, _PRIM)
+        }
+    return chunks
+
+
+def _content_id(chunk: Any) -> str:
+    """Derive a chunk's vector store ID from its document and text.
+
+    The same text from the same document always gets the same ID, so
+    unchanged chunks can be recognized (and not embedded) on re-ingest.
+
+    Args:
+        chunk: Chunk Document.
+
+    Returns:
+        32 hex characters of the XXH3-128 hash.
+    """
+    key = f"{chunk.metadata.get('doc_id', '')}\x00{chunk.page_content}"
+    return xxhash.xxh3_128_hexdigest(key.encode("utf-8"))
+
+
+def _new_chunk_batches(
+    vectordb: Any,
+    chunks: Iterable[Any],
+    batch_size: int,
+    skip_existing: bool,
+    seen_ids: set[str],
+) -> Iterator[tuple[list[Any], list[str]]]:
+    """Group chunks into batches, dropping ones that need no embedding.
+
+    Args:
+        vectordb: Chroma vector store.
+        chunks: Chunk Documents.
+        batch_size: Chunks considered per batch.
+        skip_existing: Also drop chunks whose ID is already stored, after
+            updating their stored metadata.
+        seen_ids: IDs of all chunks so far; updated in place.
+
+    Yields:
+        (chunks, ids) batches of at most batch_size chunks.
+    """
+    chunk_iter = iter(chunks)
+    while batch := list(itertools.islice(chunk_iter, batch_size)):
+        # Repeated text within a document is stored once
+        new: dict[str, Any] = {}
+        for chunk in batch:
+            chunk_id = _content_id(chunk)
+            if chunk_id not in seen_ids:
+                seen_ids.add(chunk_id)
+                new[chunk_id] = chunk
+        if skip_existing and new:
+            existing = vectordb.get(ids=list(new), include=[])["ids"]
+            if existing:
+                # Same text, but chunk position and document-level
+                # metadata may have changed; no re-embedding needed
+                updated = [new.pop(chunk_id) for chunk_id in existing]
+                vectordb._collection.update(
+                    ids=existing,
+                    metadatas=[chunk.metadata for chunk in updated],
+                )
+        if new:
+            yield list(new.values()), list(new)
+
+
+def _add_in_batches(
+    vectordb: Any,
+    chunks: Iterable[Any],
+    batch_size: int,
+    skip_existing: bool = False,
+) -> tuple[int, set[str]]:
+    """Embed and write chunks to the vector store in fixed-size batches.
+
+    Two batches are in flight at once, so one batch is embedded while the
+    previous one is written to SQLite. Chunks are pulled from the iterable
+    only as batches are formed. Chunks get content-derived IDs (see
+    _content_id).
+
+    Args:
+        vectordb: Chroma vector store whose embeddings are
+            BatchedHuggingFaceEmbeddings.
+        chunks: Chunk Documents to add.
+        batch_size: Chunks per collection add call.
+        skip_existing: Skip chunks already in the vector store rather than
+            embedding them again; only their metadata is updated.
+
+    Returns:
+        Tuple of (number of chunks added, IDs of all chunks).
+    """
+    seen_ids: set[str] = set()
+    batches = _new_chunk_batches(
+        vectordb, chunks, batch_size, skip_existing, seen_ids
+    )
+
+    def add_batch(batch: tuple[list[Any], list[str]]) -> list[str]:
+        docs, ids = batch
+        texts = [doc.page_content for doc in docs]
+        # Hand Chroma the float32 array rather than lists of Python floats;
+        # upsert so a re-ingest refreshes chunks that are already stored
+        vectordb._collection.upsert(
+            ids=ids,
+            embeddings=vectordb.embeddings.embed_array(texts),
+            documents=texts,
+            metadatas=[doc.metadata for doc in docs],
+        )
+        return ids
+
+    added = 0
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for ids in map_bounded(executor, add_batch, batches, max_pending=2):
+            added += len(ids)
+    return added, seen_ids
+
+
+def _delete_stale(vectordb: Any, keep_ids: set[str], batch_size: int) -> int:
+    """Delete stored chunks that are no longer produced by the documents.
+
+    Args:
+        vectordb: Chroma vector store.
+        keep_ids: IDs of the current chunks.
+        batch_size: IDs per get and delete call.
+
+    Returns:
+        Number of chunks deleted.
+    """
+    # Page through the stored IDs; deleting only once all pages are read
+    # keeps the offsets valid
+    stale: list[str] = []
+    offset = 0
+    while True:
+        result = vectordb.get(include=[], limit=batch_size, offset=offset)
+        page = result["ids"]
+        if not page:
+            break
+        stale.extend(chunk_id for chunk_id in page if chunk_id not in keep_ids)
+        offset += len(page)
+    for start in range(0, len(stale), batch_size):
+        vectordb.delete(ids=stale[start : start + batch_size])
+    return len(stale)
+
+
+def main(argv: list[str] | None = None):
+    """Main ingestion function.
+
+    Args:
+        argv: Command-line arguments. Defaults to sys.argv[1:].
+    """
     parser = argparse.ArgumentParser(
         description="Ingest documents into vector store"
     )
@@ -41,7 +251,26 @@ def main():
         type=int,
         help="Chunk overlap in characters (overrides config)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for chunking (defaults to the CPU count)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=512,
+        help="Chunks embedded and written per vector store batch",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Only embed chunks not yet in the vector store, and delete "
+            "stored chunks no longer produced by the documents"
+        ),
+    )
+    args = parser.parse_args(argv)
 
     # Determine data folder
     data_folder = args.data_folder or settings.DATA_FOLDER
@@ -54,75 +283,73 @@ def main():
         os.makedirs(chroma_dir, exist_ok=True)
         logger.info(f"Using ChromaDB directory: {chroma_dir}")
 
-        # Load documents
+        # Load documents (streamed; only a few are held at a time)
         logger.info(f"Loading documents from: {data_folder}")
         loader = DocumentLoader(data_folder=data_folder)
-        documents = loader.load_all_documents()
+        documents = loader.iter_documents()
 
-        if not documents:
+        first_document = next(documents, None)
+        if first_document is None:
             print(f"⚠ No documents found in {data_folder}")
             logger.warning(f"No documents found in {data_folder}")
             sys.exit(1)
 
-        logger.info(f"Loaded {len(documents)} document(s)")
+        num_documents = 0
+
+        def counted_documents() -> Iterable[Any]:
+            nonlocal num_documents
+            for doc in itertools.chain([first_document], documents):
+                num_documents += 1
+                yield doc
 
         # Chunk documents with metadata-aware chunker
         logger.info(
             f"Chunking documents (size: {chunk_size}, overlap: {chunk_overlap})"
         )
-        chunker = MetadataAwareChunker(
-            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        # Chunking is pure-Python CPU work, independent per document
+        chunk_one = partial(
+            _chunk_one, chunk_size=chunk_size, chunk_overlap=chunk_overlap
         )
-
-        all_chunks = []
-        for doc in documents:
-            # Extract source and doc_id from document metadata
-            source = doc.metadata.get("source", "Deutsche Telekom")
-            doc_id = doc.metadata.get(
-                "publication_id", doc.metadata.get("file_name", "unknown")
-            )
-
-            # Extract additional metadata to pass through
-            extra_metadata = {
-                k: v
-                for k, v in doc.metadata.items()
-                if k not in ["source", "publication_id", "file_name"]
-            }
-
-            # Chunk with metadata
-            chunks = chunker.chunk_with_metadata(
-                text=doc.page_content,
-                source=source,
-                doc_id=doc_id,
-                **extra_metadata,
+        workers = args.workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunk_lists = map_bounded(
+                executor,
+                chunk_one,
+                map(_document_payload, counted_documents()),
+                max_pending=2 * workers,
             )
-            all_chunks.extend(chunks)
 
-        logger.info(f"Created {len(all_chunks)} chunk(s)")
+            chunks = itertools.chain.from_iterable(chunk_lists)
 
-        # Filter complex metadata (lists, dicts, etc.) that ChromaDB doesn't support
-        logger.info("Filtering complex metadata for ChromaDB compatibility")
-        filtered_chunks = filter_complex_metadata(all_chunks)
+            # Get embeddings (documents are embedded in concurrent batches)
+            embeddings = get_embeddings(batched=True)
 
-        # Get embeddings
-        embeddings = get_embeddings()
+            # Build or load Chroma vectordb
+            logger.info(f"Building ChromaDB vector store at {chroma_dir}")
+            vectordb = create_vectordb(
+                embedding_function=embeddings, persist_directory=chroma_dir
+            )
+            num_added, chunk_ids = _add_in_batches(
+                vectordb, chunks, args.batch_size, args.incremental
+            )
 
-        # Build or load Chroma vectordb
-        logger.info(f"Building ChromaDB vector store at {chroma_dir}")
-        vectordb = Chroma.from_documents(
-            documents=filtered_chunks,
-            embedding=embeddings,
-            persist_directory=chroma_dir,
+        # The PersistentClient has written each batch; no persist step
+        num_chunks = len(chunk_ids)
+        logger.info(
+            f"Indexed {num_added} new of {num_chunks} chunk(s) "
+            f"from {num_documents} document(s)"
         )
+        if args.incremental:
+            num_deleted = _delete_stale(vectordb, chunk_ids, args.batch_size)
+            logger.info(f"Deleted {num_deleted} stale chunk(s)")
 
-        # Persist
-        vectordb.persist()
-        logger.info("Vector store persisted successfully")
+        # Lets the API drop retrieval results cached from the old index
+        stamp_index_version(chroma_dir)
 
         # Print counts
         print("\n✓ Ingestion completed successfully!")
-        print(f"  Documents: {len(documents)}")
-        print(f"  Chunks: {len(filtered_chunks)}")
+        print(f"  Documents: {num_documents}")
+        print(f"  Chunks: {num_chunks} ({num_added} embedded)")
         print(f"  Vector store: {chroma_dir}")
 
     except FileNotFoundError as e:
@@ -2,11 +2,14 @@
 """
 Vector store index reconstruction utility.
 Removes existing ChromaDB data and re-runs the full ingestion
-pipeline to refresh embeddings and metadata after document updates.
+pipeline to refresh embeddings and metadata after document updates,
+or updates the index in place, embedding only changed chunks.
 """
 import argparse
+import os
 import shutil
 import sys
+import threading
 from pathlib import Path
 
 from config import settings
@@ -16,6 +19,42 @@ from scripts.ingest import main as ingest_main
 logger = setup_logging()
 
 
+def _delete_tree(path: Path) -> None:
+    """Delete a directory tree, logging instead of raising on failure."""
+    try:
+        shutil.rmtree(path)
+    except OSError as e:
+        logger.warning(f"Could not delete old index at {path}: {e}")
+
+
+def _remove_index(chroma_dir: Path) -> threading.Thread | None:
+    """Move the index out of the way and delete it in the background.
+
+    Renaming is instant, so ingestion can start while the old files are
+    unlinked; a large index can otherwise take minutes to delete.
+
+    Args:
+        chroma_dir: ChromaDB directory to remove.
+
+    Returns:
+        The deleting thread (join it before exiting), or None if the
+        directory could not be renamed (e.g. a mount point) and was
+        deleted in place instead.
+    """
+    old_dir = chroma_dir.with_name(f"{chroma_dir.name}.old.{os.getpid()}")
+    try:
+        chroma_dir.rename(old_dir)
+    except OSError:
+        shutil.rmtree(chroma_dir)
+        return None
+
+    deleter = threading.Thread(
+        target=_delete_tree, args=(old_dir,), name="index-delete"
+    )
+    deleter.start()
+    return deleter
+
+
 def main():
     """Main rebuild function."""
     parser = argparse.ArgumentParser(description="Rebuild vector store index")
@@ -29,15 +68,26 @@ def main():
         action="store_true",
         help="Force rebuild without confirmation",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Keep the existing index and only embed new or changed chunks "
+            "(stale chunks are deleted)"
+        ),
+    )
     args = parser.parse_args()
 
     chroma_dir = Path(settings.CHROMA_DIR)
 
     # Check if index exists
-    if chroma_dir.exists() and chroma_dir.is_dir():
+    deleter: threading.Thread | None = None
+    if args.incremental:
+        print(f"ℹ Updating index at {chroma_dir} incrementally")
+    elif chroma_dir.exists() and chroma_dir.is_dir():
         if args.force:
             logger.info(f"Removing existing index at {chroma_dir} (forced)")
-            shutil.rmtree(chroma_dir)
+            deleter = _remove_index(chroma_dir)
             print(f"✓ Removed existing index at {chroma_dir}")
         else:
             response = (
@@ -47,7 +97,7 @@ def main():
             )
             if response == "y":
                 logger.info(f"Removing existing index: {chroma_dir}")
-                shutil.rmtree(chroma_dir)
+                deleter = _remove_index(chroma_dir)
                 print(f"✓ Removed existing index at {chroma_dir}")
             else:
                 print("✗ Rebuild aborted by user.")
@@ -56,17 +106,18 @@ def main():
         print(f"ℹ No existing index found at {chroma_dir}")
 
     # Prepare arguments for ingestion
-    original_argv = sys.argv.copy()
-    sys.argv = ["ingest.py"]
+    ingest_argv: list[str] = []
     if args.data_folder:
-        sys.argv.extend(["--data-folder", args.data_folder])
+        ingest_argv.extend(["--data-folder", args.data_folder])
+    if args.incremental:
+        ingest_argv.append("--incremental")
 
     try:
         # Run ingestion pipeline
         print("\n" + "=" * 60)
         print("Running ingestion pipeline...")
         print("=" * 60)
-        ingest_main()
+        ingest_main(ingest_argv)
     except SystemExit:
         # Re-raise SystemExit to preserve exit codes
         raise
@@ -75,8 +126,9 @@ def main():
         print(f"✗ Fatal error during rebuild: {e}", file=sys.stderr)
         sys.exit(1)
     finally:
-        # Restore original argv
-        sys.argv = original_argv
+        # Finish deleting the old index before exiting
+        if deleter is not None:
+            deleter.join()
 
 
 if __name__ == "__main__":
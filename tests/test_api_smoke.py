@@ -4,27 +4,69 @@ Exercises health checks, query processing, and input validation
 with mocked dependencies to verify request handling correctness.
 """
 
+from contextlib import ExitStack
 from unittest.mock import MagicMock, patch
 
+import pytest
 from fastapi.testclient import TestClient
+from transformers import BatchEncoding
 
 from api.routes import app
 from core.utils.imports import import_langchain_document_class
+from llm.generation import generate_response_streaming
 
 Document = import_langchain_document_class()
 
+# api.routes dependencies replaced by mocks for the whole module
+_PATCHED_DEPENDENCIES = (
+    "get_retriever",
+    "get_prompt_manager",
+    "get_tokenizer",
+    "get_model",
+    "generate_response",
+    "generate_response_streaming",
+    "structured_logger",
+)
+
+
+@pytest.fixture(scope="module")
+def client():
+    """TestClient for the app, created once per module."""
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def _patched_routes():
+    """Patch the route dependencies once per module.
+
+    Yields:
+        Dictionary of dependency name to its MagicMock.
+    """
+    with ExitStack() as stack:
+        yield {
+            name: stack.enter_context(patch(f"api.routes.{name}"))
+            for name in _PATCHED_DEPENDENCIES
+        }
+
+
+@pytest.fixture
+def mocks(_patched_routes):
+    """Route dependency mocks, reset after each test."""
+    yield _patched_routes
+    for mock in _patched_routes.values():
+        mock.reset_mock(return_value=True, side_effect=True)
 
-def test_healthz():
-    """Test health check endpoint."""
-    client = TestClient(app)
 
-    with patch("api.routes.get_vectordb") as mock_get_vectordb:
-        # Mock vector database with collection
+def test_healthz(client):
+    """Test health check endpoint."""
+    with (
+        patch("api.utils.dependencies.get_collection") as mock_get_collection,
+        patch("api.utils.dependencies._num_vectors_cache", (None, 0.0)),
+    ):
+        # Mock vector database collection
         mock_collection = MagicMock()
         mock_collection.count.return_value = 42
-        mock_vectordb = MagicMock()
-        mock_vectordb._collection = mock_collection
-        mock_get_vectordb.return_value = mock_vectordb
+        mock_get_collection.return_value = mock_collection
 
         response = client.get("/healthz")
 
@@ -35,10 +77,8 @@ def test_healthz():
         assert data["sizes"]["num_vectors"] == 42
 
 
-def test_query_with_mocked_retriever_and_model():
+def test_query_with_mocked_retriever_and_model(client, mocks):
     """Test query endpoint with mocked retriever and model."""
-    client = TestClient(app)
-
     # Mock documents
     mock_doc1 = Document(
         page_content="Deutsche Telekom offers 5G network services.",
@@ -53,111 +93,192 @@ def test_query_with_mocked_retriever_and_model():
     # Mock response from model
     mock_answer = "Deutsche Telekom offers 5G network services and focuses on telecommunications infrastructure."
 
-    with (
-        patch("api.routes.get_retriever") as mock_get_retriever,
-        patch("api.routes.get_prompt_manager") as mock_get_prompt_manager,
-        patch("api.routes.get_tokenizer") as mock_get_tokenizer,
-        patch("api.routes.get_model") as mock_get_model,
-        patch("api.routes.generate_response") as mock_generate,
-        patch("api.routes.get_logger") as mock_get_logger,
-    ):
+    # Setup mocks
+    mock_retriever = MagicMock()
+    mock_retriever.retrieve.return_value = mock_docs
+    mocks["get_retriever"].return_value = mock_retriever
+
+    mock_prompt_manager = MagicMock()
+    mock_prompt_manager.build_rag_prompt.return_value = "Mock prompt"
+    mocks["get_prompt_manager"].return_value = mock_prompt_manager
+
+    mock_tokenizer = MagicMock()
+    mocks["get_tokenizer"].return_value = mock_tokenizer
+
+    mock_model = MagicMock()
+    mocks["get_model"].return_value = mock_model
+
+    mock_generate = mocks["generate_response"]
+    mock_generate.return_value = mock_answer
+
+    # Make request
+    request_data = {
+        "query": "What does Deutsche Telekom offer?",
+        "top_k": 2,
+    }
+    response = client.post("/query", json=request_data)
+
+    # Assertions
+    assert response.status_code == 200
+    data = response.json()
+    assert "answer" in data
+    assert "sources" in data
+    assert data["answer"] == mock_answer
+    assert len(data["sources"]) == 2
+    assert "doc_001" in data["sources"]
+    assert "doc_002" in data["sources"]
+
+    # Verify mocks were called
+    mock_retriever.retrieve.assert_called_once()
+    # Verify build_rag_prompt was called with tokenizer
+    mock_prompt_manager.build_rag_prompt.assert_called_once()
+    call_args = mock_prompt_manager.build_rag_prompt.call_args
+    assert "tokenizer" in call_args.kwargs or mock_tokenizer in call_args.args
+    mock_generate.assert_called_once()
+
+
+def test_query_stream_emits_tokens_then_sources(client, mocks):
+    """Test SSE streaming endpoint with mocked retriever and model."""
+    mock_doc = Document(
+        page_content="Deutsche Telekom offers 5G network services.",
+        metadata={"publication_id": "doc_001"},
+    )
 
-        # Setup mocks
-        mock_retriever = MagicMock()
-        mock_retriever.retrieve.return_value = mock_docs
-        mock_get_retriever.return_value = mock_retriever
+    mock_retriever = MagicMock()
+    mock_retriever.retrieve.return_value = [mock_doc]
+    mocks["get_retriever"].return_value = mock_retriever
+    mocks["generate_response_streaming"].return_value = iter(
+        ["Deutsche ", "Telekom"]
+    )
 
-        mock_prompt_manager = MagicMock()
-        mock_prompt_manager.build_rag_prompt.return_value = "Mock prompt"
-        mock_get_prompt_manager.return_value = mock_prompt_manager
+    response = client.post("/query/stream", json={"query": "5G?"})
 
-        mock_tokenizer = MagicMock()
-        mock_get_tokenizer.return_value = mock_tokenizer
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == (
+        'data: {"token":"Deutsche "}\n\n'
+        'data: {"token":"Telekom"}\n\n'
+        'event: sources\ndata: {"sources":["doc_001"]}\n\n'
+    )
+    # The stop event is set once the stream is over
+    call_kwargs = mocks["generate_response_streaming"].call_args.kwargs
+    assert call_kwargs["stop_event"].is_set()
 
-        mock_model = MagicMock()
-        mock_get_model.return_value = mock_model
 
-        mock_generate.return_value = mock_answer
+def test_query_stream_ends_with_error_when_generation_fails(client, mocks):
+    """Test that a failing generate() ends the SSE stream with an error."""
 
-        mock_logger = MagicMock()
-        mock_get_logger.return_value = mock_logger
+    class FailingModel:
+        def generate(self, **kwargs):
+            raise RuntimeError("CUDA out of memory")
 
-        # Make request
-        request_data = {
-            "query": "What does Deutsche Telekom offer?",
-            "top_k": 2,
-        }
-        response = client.post("/query", json=request_data)
+    tokenizer = MagicMock(
+        return_value=BatchEncoding({"input_ids": [[1, 2, 3]]}, "pt"),
+        eos_token_id=0,
+    )
 
-        # Assertions
-        assert response.status_code == 200
-        data = response.json()
-        assert "answer" in data
-        assert "sources" in data
-        assert data["answer"] == mock_answer
-        assert len(data["sources"]) == 2
-        assert "doc_001" in data["sources"]
-        assert "doc_002" in data["sources"]
-
-        # Verify mocks were called
-        mock_retriever.retrieve.assert_called_once()
-        # Verify build_rag_prompt was called with tokenizer
-        mock_prompt_manager.build_rag_prompt.assert_called_once()
-        call_args = mock_prompt_manager.build_rag_prompt.call_args
-        assert (
-            "tokenizer" in call_args.kwargs or mock_tokenizer in call_args.args
+    mock_retriever = MagicMock()
+    mock_retriever.retrieve.return_value = [
+        Document(
+            page_content="Telekom network outage report.",
+            metadata={"publication_id": "doc_020"},
         )
-        mock_generate.assert_called_once()
+    ]
+    mocks["get_retriever"].return_value = mock_retriever
+    mocks["get_tokenizer"].return_value = tokenizer
+    mocks["get_model"].return_value = FailingModel()
+    # Run the real streaming generator against the failing model
+    mocks["generate_response_streaming"].side_effect = (
+        generate_response_streaming
+    )
 
+    with patch("api.routes.settings.DEVICE", "cpu"):
+        response = client.post("/query/stream", json={"query": "Outage?"})
 
-def test_query_with_top_k_clamping():
-    """Test that top_k is clamped to [1, 20]."""
-    client = TestClient(app)
+    assert response.status_code == 200
+    assert response.text.endswith(
+        'event: error\ndata: {"detail":"CUDA out of memory"}\n\n'
+    )
+    assert "event: sources" not in response.text
+
+
+def test_repeated_query_is_served_from_retrieval_cache(client, mocks):
+    """Test that an identical query reuses the cached retrieval result."""
+    mock_doc = Document(
+        page_content="Telekom expands fiber coverage.",
+        metadata={"publication_id": "doc_010"},
+    )
+
+    mock_retriever = MagicMock()
+    mock_retriever.retrieve.return_value = [mock_doc]
+    mocks["get_retriever"].return_value = mock_retriever
+    mock_generate = mocks["generate_response"]
+    mock_generate.return_value = "Fiber answer"
+
+    for query in ("Fiber  coverage plans?", "Fiber coverage plans? "):
+        response = client.post("/query", json={"query": query})
+        assert response.status_code == 200
+        assert response.json()["sources"] == ["doc_010"]
 
+    mock_retriever.retrieve.assert_called_once()
+    assert mock_generate.call_count == 2
+
+
+def test_retrieval_cache_misses_after_index_version_change(client, mocks):
+    """Test that a re-ingest (new index version) bypasses cached results."""
+    mock_doc = Document(
+        page_content="Telekom updates its roaming tariffs.",
+        metadata={"publication_id": "doc_030"},
+    )
+
+    mock_retriever = MagicMock()
+    mock_retriever.retrieve.return_value = [mock_doc]
+    mocks["get_retriever"].return_value = mock_retriever
+    mocks["generate_response"].return_value = "Roaming answer"
+
+    for version in ((1, 100), (1, 100), (2, 200)):
+        with patch("api.routes.read_index_version", return_value=version):
+            response = client.post("/query", json={"query": "Roaming fees?"})
+        assert response.status_code == 200
+
+    assert mock_retriever.retrieve.call_count == 2
+
+
+def test_query_with_top_k_clamping(client, mocks):
+    """Test that top_k is clamped to [1, 20]."""
     mock_doc = Document(
         page_content="Test content",
         metadata={"publication_id": "test_doc"},
     )
 
-    with (
-        patch("api.routes.get_retriever") as mock_get_retriever,
-        patch("api.routes.get_prompt_manager"),
-        patch("api.routes.get_tokenizer"),
-        patch("api.routes.get_model"),
-        patch("api.routes.generate_response") as mock_generate,
-        patch("api.routes.get_logger"),
-    ):
+    mock_retriever = MagicMock()
+    mock_retriever.retrieve.return_value = [mock_doc]
+    mocks["get_retriever"].return_value = mock_retriever
 
-        mock_retriever = MagicMock()
-        mock_retriever.retrieve.return_value = [mock_doc]
-        mock_get_retriever.return_value = mock_retriever
+    mocks["generate_response"].return_value = "Test answer"
 
-        mock_generate.return_value = "Test answer"
+    # Test with top_k at max boundary (20)
+    request_data = {"query": "Test query", "top_k": 20}
+    response = client.post("/query", json=request_data)
 
-        # Test with top_k at max boundary (20)
-        request_data = {"query": "Test query", "top_k": 20}
-        response = client.post("/query", json=request_data)
+    # Should succeed
+    assert response.status_code == 200
+    # Verify retrieve was called with correct value
+    call_args = mock_retriever.retrieve.call_args
+    assert call_args[1]["top_k"] == 20
 
-        # Should succeed
-        assert response.status_code == 200
-        # Verify retrieve was called with correct value
-        call_args = mock_retriever.retrieve.call_args
-        assert call_args[1]["top_k"] == 20
-
-        # Test with top_k at max boundary (using settings.TOP_K which might be > 20)
-        # The runtime clamping should ensure it's at most 20
-        request_data = {"query": "Test query", "top_k": None}
-        response = client.post("/query", json=request_data)
-        assert response.status_code == 200
-        call_args = mock_retriever.retrieve.call_args
-        # Should be clamped if settings.TOP_K > 20
-        assert call_args[1]["top_k"] <= 20
+    # Test with top_k at max boundary (using settings.TOP_K which might be > 20)
+    # The runtime clamping should ensure it's at most 20
+    request_data = {"query": "Test query", "top_k": None}
+    response = client.post("/query", json=request_data)
+    assert response.status_code == 200
+    call_args = mock_retriever.retrieve.call_args
+    # Should be clamped if settings.TOP_K > 20
+    assert call_args[1]["top_k"] <= 20
 
 
-def test_query_validation():
+def test_query_validation(client, mocks):
     """Test query endpoint input validation."""
-    client = TestClient(app)
-
     # Test empty query
     response = client.post("/query", json={"query": ""})
     assert response.status_code == 422  # Validation error
@@ -171,25 +292,14 @@ def test_query_validation():
     assert response.status_code == 422
 
     # Test valid query
-    with (
-        patch("api.routes.get_retriever") as mock_get_retriever,
-        patch("api.routes.get_prompt_manager"),
-        patch("api.routes.get_tokenizer"),
-        patch("api.routes.get_model"),
-        patch("api.routes.generate_response") as mock_generate,
-        patch("api.routes.get_logger"),
-    ):
-
-        mock_retriever = MagicMock()
-        mock_retriever.retrieve.return_value = []
-        mock_get_retriever.return_value = mock_retriever
-        mock_generate.return_value = "Answer"
-
-        response = client.post(
-            "/query", json={"query": "valid query", "top_k": 5}
-        )
-        # Should pass validation (even if retrieval fails, we test validation separately)
-        assert response.status_code in [
-            200,
-            404,
-        ]  # 200 if docs found, 404 if not
+    mock_retriever = MagicMock()
+    mock_retriever.retrieve.return_value = []
+    mocks["get_retriever"].return_value = mock_retriever
+    mocks["generate_response"].return_value = "Answer"
+
+    response = client.post("/query", json={"query": "valid query", "top_k": 5})
+    # Should pass validation (even if retrieval fails, we test validation separately)
+    assert response.status_code in [
+        200,
+        404,
+    ]  # 200 if docs found, 404 if not
@@ -0,0 +1,139 @@
+"""
+Generation worker and batching behavior verification.
+Runs the out-of-process generation pool and the batched generate()
+path against stub models, checking result and error propagation.
+"""
+
+import multiprocessing
+from unittest.mock import patch
+
+import pytest
+import torch
+from transformers import BatchEncoding
+
+from llm.generation import generate_batch, generate_grouped
+from llm.generation_pool import GenerationPool
+
+
+def _fake_generate_response(tokenizer, model, prompt, device, **params):
+    """Stand-in for generate_response inside the worker process."""
+    if prompt == "fail":
+        raise ValueError("generation failed")
+    return f"{tokenizer}/{model}: {prompt} ({params['max_new_tokens']})"
+
+
+class _LeftPaddingTokenizer:
+    """Tokenizer stub that left-pads with 0 and decodes IDs as text."""
+
+    pad_token_id = 0
+    eos_token = "<eos>"
+
+    def pad(self, encoded, padding, padding_side, return_tensors):
+        assert padding_side == "left"
+        rows = encoded["input_ids"]
+        width = max(len(row) for row in rows)
+        return BatchEncoding(
+            {
+                "input_ids": [[0] * (width - len(row)) + row for row in rows],
+                "attention_mask": [
+                    [0] * (width - len(row)) + [1] * len(row) for row in rows
+                ],
+            },
+            tensor_type=return_tensors,
+        )
+
+    def batch_decode(self, sequences, skip_special_tokens):
+        return [
+            " ".join(str(token) for token in row.tolist() if token != 0)
+            for row in sequences
+        ]
+
+
+class _EchoModel:
+    """Model stub appending tokens 100 + row, 200 + row to each row."""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, input_ids, attention_mask, max_new_tokens, **kwargs):
+        self.calls.append(input_ids.tolist())
+        rows = torch.arange(input_ids.shape[0]).unsqueeze(1)
+        new_tokens = torch.cat([rows + 100, rows + 200], dim=1)
+        return torch.cat([input_ids, new_tokens], dim=1)
+
+
+def test_generate_batch_returns_only_new_tokens_per_row():
+    """Test that each decoded answer excludes its own (padded) prompt."""
+    model = _EchoModel()
+    texts = generate_batch(
+        tokenizer=_LeftPaddingTokenizer(),
+        model=model,
+        input_ids=[[5, 6, 7], [8]],
+        max_new_tokens=2,
+        temperature=0.7,
+        top_p=0.9,
+        device="cpu",
+    )
+
+    assert model.calls == [[[5, 6, 7], [0, 0, 8]]]
+    assert texts == ["100 200", "101 201"]
+
+
+def test_generate_grouped_maps_answers_back_to_requests():
+    """Test that requests batched by parameters keep their order."""
+    model = _EchoModel()
+    params_a = {"max_new_tokens": 2, "temperature": 0.7, "top_p": 0.9}
+    params_b = {"max_new_tokens": 2, "temperature": 0.1, "top_p": 0.9}
+    texts = generate_grouped(
+        tokenizer=_LeftPaddingTokenizer(),
+        model=model,
+        requests=[([5, 6], params_a), ([7], params_b), ([8, 9, 10], params_a)],
+        device="cpu",
+    )
+
+    # One generate() call per parameter group
+    assert model.calls == [[[0, 5, 6], [8, 9, 10]], [[7]]]
+    assert texts == ["100 200", "100 200", "101 201"]
+
+
+def test_generation_pool_propagates_results_and_errors():
+    """Test that worker results and exceptions reach the caller's futures.
+
+    The pool is forked rather than spawned so the worker inherits the
+    stubbed model loading and generate_response.
+    """
+    with (
+        patch("llm.generation_pool.ModelManager") as mock_model_manager,
+        patch(
+            "llm.generation_pool.generate_response", _fake_generate_response
+        ),
+        patch(
+            "llm.generation_pool.multiprocessing.get_context",
+            return_value=multiprocessing.get_context("fork"),
+        ),
+    ):
+        mock_model_manager.return_value.preload.return_value = "/models/stub"
+        mock_model_manager.return_value.load_model.return_value = (
+            "tokenizer",
+            "model",
+        )
+
+        pool = GenerationPool()
+        try:
+            answer = pool.submit("hello", {"max_new_tokens": 8}).result(
+                timeout=30
+            )
+            assert answer == "tokenizer/model: hello (8)"
+
+            with pytest.raises(ValueError, match="generation failed"):
+                pool.submit("fail", {"max_new_tokens": 8}).result(timeout=30)
+
+            # The worker survives a failed generation
+            answer = pool.submit("again", {"max_new_tokens": 4}).result(
+                timeout=30
+            )
+            assert answer == "tokenizer/model: again (4)"
+        finally:
+            pool.shutdown()
+
+    mock_model_manager.return_value.preload.assert_called_once()
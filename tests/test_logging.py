@@ -0,0 +1,40 @@
+"""
+Structured logging output verification.
+Checks that JSON log lines written through the background queue
+listener carry the request context of the logging call.
+"""
+
+import orjson
+
+from monitoring.logging import (
+    StructuredLogger,
+    _queue_listeners,
+    bind_request_context,
+    reset_request_context,
+)
+
+
+def test_json_log_carries_request_context(tmp_path):
+    """Test that request_id and trace_id survive the queue listener."""
+    structured_logger = StructuredLogger("test_context", log_dir=tmp_path)
+
+    tokens = bind_request_context("req-123", "trace-456")
+    try:
+        structured_logger.logger.info("inside request")
+    finally:
+        reset_request_context(tokens)
+    structured_logger.logger.info("outside request")
+
+    # Drain the queue and flush the buffered file
+    listener = _queue_listeners.pop("test_context")
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+    lines = (tmp_path / "test_context.jsonl").read_text().splitlines()
+    inside, outside = (orjson.loads(line) for line in lines)
+    assert inside["message"] == "inside request"
+    assert inside["request_id"] == "req-123"
+    assert inside["trace_id"] == "trace-456"
+    assert "request_id" not in outside
+    assert "trace_id" not in outside
@@ -176,7 +176,7 @@ def test_reranking(tmp_path):
         # Define scores by publication_id (doc_2 should win)
         score_map = {"doc_1": 0.3, "doc_2": 0.9, "doc_3": 0.5}
 
-        def mock_predict(pairs):
+        def mock_predict(pairs, batch_size=None):
             """Mock predict that returns scores based on document content."""
             # pairs is [[query, doc_text], ...]
             scores = []
@@ -215,3 +215,88 @@ def test_reranking(tmp_path):
         assert (
             mock_cross_encoder_instance.predict.called
         ), "CrossEncoder.predict should be called to rerank documents"
+
+
+def test_reranking_batches_concurrent_queries():
+    """Test that concurrent reranks are coalesced into one predict call.
+
+    Uses a mocked vector store and CrossEncoder; each query must still
+    receive its own correctly ordered results.
+    """
+    import threading
+
+    import numpy as np
+
+    documents = [
+        Document(page_content=f"text {i}", metadata={"publication_id": i})
+        for i in range(3)
+    ]
+    vectordb = Mock()
+    vectordb.similarity_search.return_value = documents
+
+    def mock_predict(pairs, batch_size=None):
+        """Score each pair by its document index, reversed per query."""
+        return np.array(
+            [
+                int(doc_text[-1]) * (1 if query == "asc" else -1)
+                for query, doc_text in pairs
+            ]
+        )
+
+    with (
+        patch("core.retrieval.CrossEncoder") as mock_cross_encoder_class,
+        patch("core.retrieval.settings.ENABLE_RERANK_BATCHING", True),
+        patch("core.retrieval.settings.RERANK_BATCH_WAIT_MS", 200.0),
+    ):
+        mock_cross_encoder_instance = Mock()
+        mock_cross_encoder_instance.predict.side_effect = mock_predict
+        mock_cross_encoder_class.return_value = mock_cross_encoder_instance
+
+        retriever = AdvancedRetriever(
+            vectordb=vectordb,
+            reranker_model="cross-encoder/ms-marco-MiniLM-L-6-v2",
+        )
+
+        results: dict[str, list] = {}
+
+        def run(query: str) -> None:
+            results[query] = retriever.retrieve(
+                query=query, top_k=2, rerank_top_k=3
+            )
+
+        threads = [
+            threading.Thread(target=run, args=(q,)) for q in ("asc", "desc")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    assert mock_cross_encoder_instance.predict.call_count == 1
+    assert len(mock_cross_encoder_instance.predict.call_args.args[0]) == 6
+    assert [d.metadata["publication_id"] for d in results["asc"]] == [2, 1]
+    assert [d.metadata["publication_id"] for d in results["desc"]] == [0, 1]
+
+
+def test_retrieve_reuses_query_embedding():
+    """Test that a precomputed query embedding skips query embedding.
+
+    The vector store must be searched by vector, not by query text.
+    """
+    documents = [
+        Document(page_content=f"text {i}", metadata={"publication_id": i})
+        for i in range(3)
+    ]
+    vectordb = Mock()
+    vectordb.similarity_search_by_vector.return_value = documents
+
+    retriever = AdvancedRetriever(vectordb=vectordb, reranker_model=None)
+    results = retriever.retrieve(
+        query="5G network", top_k=2, query_embedding=[0.1, 0.2, 0.3]
+    )
+
+    assert results == documents[:2]
+    vectordb.similarity_search_by_vector.assert_called_once_with(
+        [0.1, 0.2, 0.3], k=2, filter=None
+    )
+    vectordb.similarity_search.assert_not_called()
@@ -0,0 +1,65 @@
+"""
+Semantic answer cache behavior verification.
+Covers similarity threshold hits and misses, key matching, FIFO
+eviction and embedding normalization.
+"""
+
+import numpy as np
+
+from core.semantic_cache import SemanticCache
+
+
+def _unit(*values):
+    return SemanticCache.normalize(values)
+
+
+def test_hit_above_threshold_and_miss_below():
+    """Test that only embeddings similar enough to a stored one hit."""
+    cache = SemanticCache(maxsize=4, threshold=0.95)
+    cache.put(_unit(1.0, 0.0), "answer")
+
+    # cos ~0.995
+    assert cache.get(_unit(1.0, 0.1)) == "answer"
+    # cos ~0.707
+    assert cache.get(_unit(1.0, 1.0)) is None
+
+
+def test_empty_cache_misses():
+    """Test that lookups before any put miss."""
+    cache = SemanticCache(maxsize=4)
+    assert cache.get(_unit(1.0, 0.0)) is None
+
+
+def test_key_must_match():
+    """Test that an identical embedding stored under another key misses."""
+    cache = SemanticCache(maxsize=4)
+    cache.put(_unit(1.0, 0.0), "low temperature", key=(5, 0.1))
+    cache.put(_unit(1.0, 0.0), "high temperature", key=(5, 0.9))
+
+    assert cache.get(_unit(1.0, 0.0), key=(5, 0.1)) == "low temperature"
+    assert cache.get(_unit(1.0, 0.0), key=(5, 0.9)) == "high temperature"
+    assert cache.get(_unit(1.0, 0.0), key=(10, 0.1)) is None
+    assert cache.get(_unit(1.0, 0.0)) is None
+
+
+def test_oldest_entry_is_evicted_at_maxsize():
+    """Test FIFO eviction once maxsize entries are stored."""
+    cache = SemanticCache(maxsize=2, threshold=0.99)
+    cache.put(_unit(1.0, 0.0, 0.0), "first")
+    cache.put(_unit(0.0, 1.0, 0.0), "second")
+    cache.put(_unit(0.0, 0.0, 1.0), "third")
+
+    assert cache.get(_unit(1.0, 0.0, 0.0)) is None
+    assert cache.get(_unit(0.0, 1.0, 0.0)) == "second"
+    assert cache.get(_unit(0.0, 0.0, 1.0)) == "third"
+
+
+def test_normalize():
+    """Test unit-length float32 output, with zero vectors left as is."""
+    vector = SemanticCache.normalize([3.0, 4.0])
+    assert vector.dtype == np.float32
+    np.testing.assert_allclose(vector, [0.6, 0.8], rtol=1e-6)
+
+    zero = SemanticCache.normalize([0.0, 0.0])
+    assert zero.dtype == np.float32
+    np.testing.assert_array_equal(zero, [0.0, 0.0])
@@ -5,6 +5,7 @@ attribution, and configurable retrieval parameters for end users.
 """
 
 import time
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Any
 
@@ -17,15 +18,13 @@ if st.query_params.get("health") is not None:
 from config import settings
 from core.embeddings import get_embeddings
 from core.retrieval import AdvancedRetriever
-from core.utils.imports import import_langchain_chroma
+from core.semantic_cache import SemanticCache
+from core.vectorstore import create_vectordb
 from llm.generation import generate_response, generate_response_streaming
 from llm.model_manager import ModelManager
 from llm.prompt_manager import PromptManager
 from monitoring.logging import StructuredLogger
 
-Chroma = import_langchain_chroma()
-
-
 # Page config
 st.set_page_config(
     page_title="📡 RAG Assistant",
@@ -34,12 +33,14 @@ st.set_page_config(
 )
 
 
-@st.cache_resource
+# The function shows its own spinner around the slow model load
+@st.cache_resource(show_spinner=False)
 def initialize_system() -> dict[str, Any]:
     """Initialize system components with caching.
 
     Returns:
-        Dictionary containing: tokenizer, model, retriever, prompt_manager, logger.
+        Dictionary containing: tokenizer, model, embeddings, retriever,
+        prompt_manager, semantic_cache (None if disabled), logger.
     """
     logger = StructuredLogger("rag_assistant", log_dir=settings.LOG_DIR)
 
@@ -71,8 +72,8 @@ def initialize_system() -> dict[str, Any]:
 
     # Load existing ChromaDB
     st.info(f"Loading vector store from {chroma_dir}")
-    vectordb = Chroma(
-        persist_directory=chroma_dir, embedding_function=embeddings
+    vectordb = create_vectordb(
+        embedding_function=embeddings, persist_directory=chroma_dir
     )
 
     # Verify it has data
@@ -103,15 +104,51 @@ def initialize_system() -> dict[str, Any]:
     # Prompt manager
     prompt_manager = PromptManager()
 
+    # Answers to near-duplicate first questions, shared across sessions
+    semantic_cache = None
+    if settings.SEMANTIC_CACHE_SIZE > 0:
+        semantic_cache = SemanticCache(
+            maxsize=settings.SEMANTIC_CACHE_SIZE,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        )
+
     return {
         "tokenizer": tokenizer,
         "model": model,
+        "embeddings": embeddings,
         "retriever": retriever,
         "prompt_manager": prompt_manager,
+        "semantic_cache": semantic_cache,
         "logger": logger,
     }
 
 
+def _coalesce_chunks(chunks: Iterable[str], interval: float) -> Iterator[str]:
+    """Join streamed text chunks into one chunk per time interval.
+
+    Each chunk handed to st.write_stream re-renders the whole answer, so
+    tokens are batched to a few renders per second.
+
+    Args:
+        chunks: Streamed text chunks (e.g. generated tokens).
+        interval: Minimum seconds between yielded chunks.
+
+    Yields:
+        Concatenated chunks; the remainder is yielded at the end.
+    """
+    buffer: list[str] = []
+    last_yield = time.monotonic()
+    for chunk in chunks:
+        buffer.append(chunk)
+        now = time.monotonic()
+        if now - last_yield >= interval:
+            yield "".join(buffer)
+            buffer.clear()
+            last_yield = now
+    if buffer:
+        yield "".join(buffer)
+
+
 def main():
     """Main Streamlit application."""
     st.title("📡 RAG Assistant")
@@ -171,8 +208,10 @@ def main():
         system = initialize_system()
         tokenizer = system["tokenizer"]
         model = system["model"]
+        embeddings = system["embeddings"]
         retriever = system["retriever"]
         prompt_manager = system["prompt_manager"]
+        semantic_cache = system["semantic_cache"]
         logger = system["logger"]
     except Exception as e:
         st.error(f"Failed to initialize system: {e}")
@@ -210,104 +249,127 @@ def main():
 
             try:
                 # Measure total processing time
-                start_time = time.time()
-
-                # Retrieve documents (use session state top_k)
-                status_bar.info("🔍 Retrieving relevant documents...")
-                retrieved_docs = retriever.retrieve(
-                    query=user_query,
-                    top_k=st.session_state.top_k,
-                    rerank_top_k=st.session_state.rerank_top_k,
-                )
-
-                retrieval_time = time.time() - start_time
-
-                if not retrieved_docs:
-                    st.warning("No relevant documents found.")
-                    st.stop()
-
-                # Build prompt
-                status_bar.info("📝 Building prompt...")
-                # Convert chat history to dict format (exclude current message)
-                chat_history: list[dict[str, str]] | None = None
-                if len(st.session_state.messages) > 1:
-                    chat_history = [
-                        {"role": msg["role"], "content": msg["content"]}
-                        for msg in st.session_state.messages[:-1]
-                    ]
-                prompt = prompt_manager.build_rag_prompt(
-                    query=user_query,
-                    context_docs=retrieved_docs,
-                    chat_history=chat_history,
-                    tokenizer=tokenizer,
-                )
-
-                # Generate response with streaming
-                status_bar.info("🤖 Generating response...")
-                response_start = time.time()
-
-                # Initialize response accumulator
-                full_response = ""
-                last_update_time = time.time()
-                update_interval = 0.1  # Update every 0.1 seconds
-                streaming_cursor = "▌"
-
-                # Stream tokens
-                try:
-                    for token_chunk in generate_response_streaming(
-                        tokenizer=tokenizer,
-                        model=model,
-                        prompt=prompt,
-                        max_new_tokens=settings.MAX_NEW_TOKENS,
-                        temperature=st.session_state.temperature,
-                        top_p=settings.TOP_P,
-                        device=settings.DEVICE,
-                    ):
-                        # Accumulate tokens
-                        full_response += token_chunk
-
-                        # Throttle updates to maintain responsiveness (update every 0.1s)
-                        current_time = time.time()
-                        if current_time - last_update_time >= update_interval:
-                            # Show streaming cursor while generating
-                            response_placeholder.markdown(
-                                full_response + streaming_cursor
-                            )
-                            last_update_time = current_time
-
-                    # Final update without cursor once complete
-                    response_placeholder.markdown(full_response)
-                    status_bar.empty()  # Clear status bar
-                    response = full_response
-
-                except Exception:
-                    # Fallback to non-streaming if streaming fails
-                    st.warning(
-                        "Streaming unavailable, using standard generation..."
-                    )
-                    response = generate_response(
-                        tokenizer=tokenizer,
-                        model=model,
-                        prompt=prompt,
-                        max_new_tokens=settings.MAX_NEW_TOKENS,
-                        temperature=st.session_state.temperature,
-                        top_p=settings.TOP_P,
-                        device=settings.DEVICE,
+                start_time = time.perf_counter()
+
+                # Only first questions are cached; later answers depend on
+                # the conversation so far
+                cached = raw_embedding = query_embedding = cache_key = None
+                if (
+                    semantic_cache is not None
+                    and len(st.session_state.messages) == 1
+                ):
+                    cache_key = (
+                        st.session_state.top_k,
+                        st.session_state.rerank_top_k,
+                        st.session_state.temperature,
                     )
+                    # Embedded once; retrieval below reuses the embedding
+                    raw_embedding = embeddings.embed_query(user_query)
+                    query_embedding = semantic_cache.normalize(raw_embedding)
+                    cached = semantic_cache.get(query_embedding, key=cache_key)
+
+                if cached is not None:
+                    # Near-duplicate of an answered question
+                    retrieved_docs, response, publication_ids = cached
                     response_placeholder.markdown(response)
                     status_bar.empty()  # Clear status bar
+                    retrieval_time = generation_time = 0.0
+                else:
+                    # Retrieve documents (use session state top_k)
+                    status_bar.info("🔍 Retrieving relevant documents...")
+                    retrieved_docs = retriever.retrieve(
+                        query=user_query,
+                        top_k=st.session_state.top_k,
+                        rerank_top_k=st.session_state.rerank_top_k,
+                        query_embedding=raw_embedding,
+                    )
 
-                generation_time = time.time() - response_start
-                total_time = time.time() - start_time
+                    retrieval_time = time.perf_counter() - start_time
+
+                    if not retrieved_docs:
+                        st.warning("No relevant documents found.")
+                        st.stop()
+
+                    # Build prompt
+                    status_bar.info("📝 Building prompt...")
+                    # Convert recent chat history to dict format (exclude
+                    # current message); older turns are dropped to bound
+                    # the prompt length
+                    history_start = -1 - settings.CHAT_HISTORY_MAX_MESSAGES
+                    chat_history: list[dict[str, str]] | None = None
+                    if len(st.session_state.messages) > 1:
+                        chat_history = [
+                            {"role": msg["role"], "content": msg["content"]}
+                            for msg in st.session_state.messages[
+                                history_start:-1
+                            ]
+                        ]
+                    prompt = prompt_manager.build_rag_prompt(
+                        query=user_query,
+                        context_docs=retrieved_docs,
+                        chat_history=chat_history,
+                        tokenizer=tokenizer,
+                    )
 
-                # Extract publication IDs from sources
-                publication_ids: list[str] = []
-                for doc in retrieved_docs:
-                    pub_id = doc.metadata.get(
-                        "publication_id", doc.metadata.get("doc_id", "unknown")
+                    # Generate response with streaming
+                    status_bar.info("🤖 Generating response...")
+                    response_start = time.perf_counter()
+
+                    # Stream tokens (Streamlit shows a cursor while streaming)
+                    try:
+                        token_chunks = generate_response_streaming(
+                            tokenizer=tokenizer,
+                            model=model,
+                            prompt=prompt,
+                            max_new_tokens=settings.MAX_NEW_TOKENS,
+                            temperature=st.session_state.temperature,
+                            top_p=settings.TOP_P,
+                            device=settings.DEVICE,
+                        )
+                        with response_placeholder.container():
+                            response = st.write_stream(
+                                _coalesce_chunks(token_chunks, interval=0.1)
+                            )
+                        status_bar.empty()  # Clear status bar
+
+                    except Exception:
+                        # Fallback to non-streaming if streaming fails
+                        st.warning(
+                            "Streaming unavailable, using standard generation..."
+                        )
+                        response = generate_response(
+                            tokenizer=tokenizer,
+                            model=model,
+                            prompt=prompt,
+                            max_new_tokens=settings.MAX_NEW_TOKENS,
+                            temperature=st.session_state.temperature,
+                            top_p=settings.TOP_P,
+                            device=settings.DEVICE,
+                        )
+                        response_placeholder.markdown(response)
+                        status_bar.empty()  # Clear status bar
+
+                    generation_time = time.perf_counter() - response_start
+
+                    # Extract publication IDs from sources (ordered, unique)
+                    publication_ids: list[str] = list(
+                        dict.fromkeys(
+                            doc.metadata.get(
+                                "publication_id",
+                                doc.metadata.get("doc_id", "unknown"),
+                            )
+                            for doc in retrieved_docs
+                        )
                     )
-                    if pub_id not in publication_ids:
-                        publication_ids.append(pub_id)
+
+                    if query_embedding is not None:
+                        semantic_cache.put(
+                            query_embedding,
+                            (retrieved_docs, response, publication_ids),
+                            key=cache_key,
+                        )
+
+                total_time = time.perf_counter() - start_time
 
                 # Show sources
                 if publication_ids: